@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the scrapers, run against a generated local site.
+"""
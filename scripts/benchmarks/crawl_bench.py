@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Make the shared helpers in scripts/ importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_site import FixtureSite
+from blogs.engine import extract_post, scrape_all
+from blogs.profiles import PROFILES
+from common.fetch import configure, fetch
+from common.ratelimit import HostScheduler
+
+# Which generated site each profile is benchmarked against
+SITES = {'blogger': 'blogger', 'blogger-text': 'blogger', 'freefind': 'freefind'}
+
+# Metric -> True when a larger value is better, used by --compare
+METRICS = {
+    'posts_per_sec': True,
+    'fetch_p50_ms': False,
+    'fetch_p95_ms': False,
+    'parse_ms_per_post': False,
+    'pdf_seconds': False,
+    'peak_rss_mb': False,
+}
+
+
+class LatencyRecorder(HostScheduler):
+    """
+    HostScheduler that never throttles and keeps the duration of every request attempt.
+    """
+
+    def __init__(self):
+        super().__init__(rate=1e6, burst=1e6, respect_robots=False)
+        self.latencies = []
+
+    def record(self, url, status_code, elapsed):
+        super().record(url, status_code, elapsed)
+        self.latencies.append(elapsed)
+
+
+def percentile(values, fraction):
+    """
+    Return the value at `fraction` (0-1) of the sorted values, or None for no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[round(fraction * (len(ordered) - 1))]
+
+
+def peak_rss_mb():
+    """
+    Return this process's peak resident set size in MB, or None where it cannot be read.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def export_pdf(profile_name, posts, filename, batch_size, workers):
+    """
+    Export posts the way the profile's script does: WeasyPrint for HTML, reportlab for text.
+    """
+    html_fields = tuple(key for key, field in PROFILES[profile_name].fields.items() if field.output == 'html')
+    if html_fields:
+        from blogs.pdf_export import save_to_pdf_streaming
+        save_to_pdf_streaming(posts, filename, fields=html_fields, batch_size=batch_size, workers=workers)
+    else:
+        from blogs.text_export import save_text_pdf
+        save_text_pdf(posts, filename, shard_size=batch_size, workers=workers)
+
+
+def run_scenario(scenario):
+    """
+    Crawl, parse and export one profile against the fixture site. Runs in a fresh process.
+
+    Returns:
+        dict: The measurements for the profile.
+    """
+    profile = PROFILES[scenario['profile']]
+    recorder = LatencyRecorder()
+    configure(scheduler=recorder, retries=scenario['retries'], backoff_factor=0.05)
+    log = sys.stdout if scenario['verbose'] else io.StringIO()
+
+    with contextlib.redirect_stdout(log):
+        start = time.perf_counter()
+        posts = scrape_all(profile, scenario['listing_url'], max_workers=scenario['workers'])
+        crawl_seconds = time.perf_counter() - start
+    latencies = list(recorder.latencies)
+
+    # Time parsing and extraction on their own, from markup already in memory
+    sample = [(post['url'], fetch(post['url']).text) for post in posts[:scenario['parse_sample']]]
+    start = time.perf_counter()
+    for url, markup in sample:
+        extract_post(profile, markup, url)
+    parse_seconds = time.perf_counter() - start
+
+    pdf_seconds = pdf_error = None
+    if scenario['pdf'] and posts:
+        with tempfile.TemporaryDirectory() as out_dir, contextlib.redirect_stdout(log):
+            start = time.perf_counter()
+            try:
+                export_pdf(scenario['profile'], posts, os.path.join(out_dir, 'bench.pdf'),
+                           scenario['batch_size'], scenario['pdf_workers'])
+                pdf_seconds = round(time.perf_counter() - start, 3)
+            except Exception as e:  # e.g. WeasyPrint's system libraries are missing
+                pdf_error = f"{type(e).__name__}: {e}"
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'posts': len(posts),
+        'crawl_seconds': round(crawl_seconds, 3),
+        'posts_per_sec': round(len(posts) / crawl_seconds, 2) if crawl_seconds else None,
+        'fetch_requests': len(latencies),
+        'fetch_p50_ms': ms(percentile(latencies, 0.5)),
+        'fetch_p95_ms': ms(percentile(latencies, 0.95)),
+        'parse_ms_per_post': ms(parse_seconds / len(sample)) if sample else None,
+        'pdf_seconds': pdf_seconds,
+        'pdf_error': pdf_error,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print how each metric moved against a baseline and return the regressions beyond `threshold`.
+    """
+    regressions = []
+    for profile, result in results.items():
+        old = baseline.get('results', {}).get(profile)
+        if not old:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = 'REGRESSION' if worse > threshold else ''
+            print(f"{profile:>12} {metric:<18} {before:>10} -> {after:<10} {change:+.1%} {flag}")
+            if flag:
+                regressions.append((profile, metric, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the blog crawlers against a generated local site.")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(SITES), default=['blogger', 'freefind'])
+    parser.add_argument('--posts', type=int, default=100, help="Posts on each generated site")
+    parser.add_argument('--per-page', type=int, default=10, help="Posts per listing page")
+    parser.add_argument('--post-bytes', type=int, default=5000, help="Approximate text size of each post")
+    parser.add_argument('--images', type=int, default=0, help="Images embedded in each post")
+    parser.add_argument('--image-px', type=int, default=200, help="Width and height of the images")
+    parser.add_argument('--latency', type=float, default=0.02, help="Mean seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--retries', type=int, default=3, help="Fetcher retries per request")
+    parser.add_argument('--workers', type=int, default=8, help="Posts downloaded at once")
+    parser.add_argument('--parse-sample', type=int, default=50, help="Posts used to time parsing")
+    parser.add_argument('--no-pdf', dest='pdf', action='store_false', help="Skip the PDF export")
+    parser.add_argument('--batch-size', type=int, default=25, help="Posts per rendered PDF batch or text shard")
+    parser.add_argument('--pdf-workers', type=int, default=1, help="PDF rendering processes")
+    parser.add_argument('--output', default='bench_baseline.json', help="JSON file to write the results to")
+    parser.add_argument('--compare', help="Baseline JSON to compare the results with")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Relative change counted as a regression by --compare. Default is 0.2")
+    parser.add_argument('--verbose', action='store_true', help="Show the scrapers' own progress output")
+    args = parser.parse_args()
+
+    site = FixtureSite(posts=args.posts, per_page=args.per_page, post_bytes=args.post_bytes,
+                       images=args.images, image_px=args.image_px, latency=args.latency,
+                       error_rate=args.error_rate)
+    results = {}
+    with site:
+        for profile in args.profiles:
+            scenario = {
+                'profile': profile,
+                'listing_url': site.listing_url(SITES[profile]),
+                'workers': args.workers,
+                'retries': args.retries,
+                'parse_sample': args.parse_sample,
+                'pdf': args.pdf,
+                'batch_size': args.batch_size,
+                'pdf_workers': args.pdf_workers,
+                'verbose': args.verbose,
+            }
+            served, errors = site.requests, site.errors
+            # A fresh process per profile, so peak RSS is the profile's own
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                result = pool.submit(run_scenario, scenario).result()
+            result['server_requests'] = site.requests - served
+            result['injected_errors'] = site.errors - errors
+            results[profile] = result
+
+            print(f"{profile}: {result['posts']} posts, {result['posts_per_sec']} posts/s, "
+                  f"fetch p50 {result['fetch_p50_ms']} ms / p95 {result['fetch_p95_ms']} ms, "
+                  f"parse {result['parse_ms_per_post']} ms/post, PDF {result['pdf_seconds']} s, "
+                  f"peak RSS {result['peak_rss_mb']} MB")
+            if result['pdf_error']:
+                print(f"{profile}: PDF export failed: {result['pdf_error']}")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'verbose')},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import html
+import io
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore '
+         'et dolore magna aliqua').split()
+
+
+def placeholder_png(size_px):
+    """
+    Return a noisy square PNG of `size_px` pixels a side, which compresses about as badly as a photo.
+    """
+    from PIL import Image
+
+    image = Image.frombytes('RGB', (size_px, size_px), random.Random(size_px).randbytes(size_px * size_px * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class FixtureSite:
+    """
+    Local HTTP server generating Blogger-style and FreeFind-style pages for benchmarks.
+
+    Blogger listings live under /blogger/page/<n> and link posts with
+    h3.post-title.entry-title headings and an #Blog1_blog-pager-older-link to the next
+    page. FreeFind listings live under /freefind/page/<n> and list posts as 'li a'
+    links followed by a '[Next]' link. Post pages carry the markup each profile
+    extracts, `post_bytes` of paragraph text and `images` inline images. Pages are
+    generated from the post number, so every run serves identical content.
+
+    Args:
+        posts (int): Number of posts on each site. Default is 100.
+        per_page (int): Posts listed per listing page. Default is 10.
+        post_bytes (int): Approximate size of each post's text. Default is 5000.
+        images (int): Images embedded in each post. Default is 0.
+        image_px (int): Width and height of the images. Default is 200.
+        latency (float): Mean delay in seconds added to every response; each request
+            waits between half and one and a half times this. Default is 0.
+        error_rate (float): Fraction of requests answered with 503. Default is 0.
+        seed (int): Seed for latency jitter and injected errors. Default is 0.
+    """
+
+    def __init__(self, posts=100, per_page=10, post_bytes=5000, images=0, image_px=200,
+                 latency=0.0, error_rate=0.0, seed=0):
+        self.posts = posts
+        self.per_page = per_page
+        self.post_bytes = post_bytes
+        self.images = images
+        self.latency = latency
+        self.error_rate = error_rate
+        self.image = placeholder_png(image_px) if images else b''
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def listing_url(self, site):
+        """
+        Return the first listing page of 'blogger' or 'freefind'.
+        """
+        return f"{self.base_url}/{site}/page/0"
+
+    def start(self):
+        """
+        Serve on a free local port from a background thread and return the base URL.
+        """
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                site.handle(self)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, request):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * self._random.uniform(0.5, 1.5)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+
+        parts = request.path.strip('/').split('/')
+        if parts == ['robots.txt']:
+            return self.send(request, 200, b'User-agent: *\nAllow: /\n', 'text/plain')
+        if fail:
+            return self.send(request, 503, b'Service Unavailable', 'text/plain')
+
+        try:
+            if len(parts) == 3 and parts[0] in ('blogger', 'freefind') and parts[1] in ('page', 'post'):
+                number = int(parts[2])
+                if parts[1] == 'page':
+                    body = self.blogger_page(number) if parts[0] == 'blogger' else self.freefind_page(number)
+                else:
+                    body = self.blogger_post(number) if parts[0] == 'blogger' else self.freefind_post(number)
+                if body is not None:
+                    return self.send(request, 200, body.encode('utf-8'), 'text/html; charset=utf-8')
+            elif len(parts) == 2 and parts[0] == 'img' and self.image:
+                return self.send(request, 200, self.image, 'image/png')
+        except ValueError:
+            pass
+        self.send(request, 404, b'Not Found', 'text/plain')
+
+    @staticmethod
+    def send(request, status, body, content_type):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def page_posts(self, page):
+        start = page * self.per_page
+        if page < 0 or start >= self.posts:
+            return None
+        return range(start, min(self.posts, start + self.per_page))
+
+    def has_next(self, page):
+        return (page + 1) * self.per_page < self.posts
+
+    def paragraphs(self, number):
+        """
+        Return about post_bytes of deterministic paragraph markup for a post, with its images.
+        """
+        rng = random.Random(number)
+        parts = []
+        size = 0
+        while size < self.post_bytes or len(parts) < 2:  # FreeFind posts need two paragraphs
+            text = ' '.join(rng.choice(WORDS) for _ in range(60))
+            parts.append(f"<p>{text}.</p>")
+            size += len(text) + 8
+        for k in range(self.images):
+            parts.insert(min(len(parts), k + 1),
+                         f"<img src='{self.base_url}/img/{number}-{k}.png' width='600' alt='Figure {k}'>")
+        return ''.join(parts)
+
+    def blogger_page(self, page):
+        numbers = self.page_posts(page)
+        if numbers is None:
+            return None
+        items = ''.join(
+            f"<div class='post'><h3 class='post-title entry-title'>"
+            f"<a href='/blogger/post/{i}'>Benchmark post {i}</a></h3></div>"
+            for i in numbers
+        )
+        older = (f"<a class='blog-pager-older-link' id='Blog1_blog-pager-older-link' "
+                 f"href='/blogger/page/{page + 1}'>Older Posts</a>" if self.has_next(page) else '')
+        return f"<html><head><title>Benchmark blog</title></head><body>{items}<div id='blog-pager'>{older}</div></body></html>"
+
+    def blogger_post(self, number):
+        if not 0 <= number < self.posts:
+            return None
+        return (f"<html><head><title>Benchmark post {number}</title></head><body>"
+                f"<div class='sidebar'><p>Sidebar text that the parser can skip.</p></div>"
+                f"<div class='post'><h3 class='post-title entry-title'>Benchmark post {number}</h3>"
+                f"<div class='post-body entry-content'>{self.paragraphs(number)}</div></div>"
+                f"</body></html>")
+
+    def freefind_page(self, page):
+        numbers = self.page_posts(page)
+        if numbers is None:
+            return None
+        items = ''.join(f"<li><a href='/freefind/post/{i}'>Result {i}</a></li>" for i in numbers)
+        next_link = f"<a href='/freefind/page/{page + 1}'>[Next]</a>" if self.has_next(page) else ''
+        return f"<html><head><title>Search results</title></head><body><ol>{items}</ol>{next_link}</body></html>"
+
+    def freefind_post(self, number):
+        if not 0 <= number < self.posts:
+            return None
+        return (f"<html><head><title>{html.escape(f'Search hit {number}')}</title></head><body>"
+                f"{self.paragraphs(number)}</body></html>")
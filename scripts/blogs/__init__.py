@@ -0,0 +1,3 @@
+"""
+Blog scrapers and the helpers they share.
+"""
@@ -1,111 +1,68 @@
 import os
-import time
-import requests
-from bs4 import BeautifulSoup
-from weasyprint import HTML
+import sys
 
+# Make the shared helpers in scripts/common importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def scrape_all_posts(base_url, max_posts=None):
+from blogs.engine import iter_posts
+from blogs.images import ImageStore, localize_images
+from blogs.pdf_export import build_posts_html
+from blogs.post_index import PostIndex
+from blogs.profiles import FREEFIND
+from blogs.sinks import PdfBatchSink, SearchSink, drain
+from common.fetch import configure
+from common.metrics import configure_metrics
+from common.ratelimit import HostScheduler
+
+
+def iter_all_posts(base_url, max_posts=None, max_workers=1, state_file=None, incremental=False, index=None,
+                   compress=False):
     """
-    Scrape all posts, navigating through a list of links on each page and preserving the format and images.
+    Yield posts as they are scraped, starting with those in the state file.
+
+    Takes the same arguments as scrape_all_posts. Closing the generator stops the
+    crawl and saves the checkpoint.
+
+    Yields:
+        dict or PostRecord: Post title, first two paragraphs and URL, in listing order.
     """
-    all_posts = []
-    next_page_url = base_url  # Start at the base URL
-    post_counter = 0
+    return iter_posts(FREEFIND, base_url, max_posts=max_posts, max_workers=max_workers,
+                      state_file=state_file, incremental=incremental, index=index, compress=compress)
 
-    try:
-        while next_page_url:
-            # Request the page containing the list of links
-            try:
-                response = requests.get(next_page_url, timeout=10)
-                response.raise_for_status()
-            except requests.RequestException as e:
-                print(f"Error fetching page {next_page_url}: {e}")
-                break
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Select links inside <li> tags
-            list_links = soup.select('li a[href]')
-
-            if not list_links:
-                print(f"No links found on page {next_page_url}. Exiting...")
-                break
-
-            for link in list_links:
-                # Get the post URL and navigate to it
-                post_url = link.get('href')
-                try:
-                    post_response = requests.get(post_url, timeout=10)
-                    post_response.raise_for_status()
-                except requests.RequestException as e:
-                    print(f"Error fetching post {post_url}: {e}")
-                    continue
-
-                post_soup = BeautifulSoup(post_response.text, 'html.parser')
-
-                # Extract the first two <p> tags (with images included)
-                p_tags = post_soup.select('p')
-                if len(p_tags) < 2:
-                    print(f"Not enough <p> tags in post: {post_url}")
-                    continue
-
-                first_p_html = str(p_tags[0])  # Include the HTML and images
-                second_p_html = str(p_tags[1])  # Include the HTML and images
-
-                # Extract the title
-                title_tag = post_soup.find('title')
-                title = title_tag.get_text(strip=True) if title_tag else "No Title"
-
-                # Save the post details
-                all_posts.append({
-                    'title': title,
-                    'first_p_html': first_p_html,
-                    'second_p_html': second_p_html,
-                    'url': post_url
-                })
-
-                post_counter += 1
-                print(f"Scraped post {post_counter}: {title}")
-
-                # Stop if we've reached the max_posts limit
-                if max_posts and post_counter >= max_posts:
-                    print(f"Reached max posts limit of {max_posts}. Stopping...")
-                    return all_posts
-
-            # Find the link to the next page
-            next_page_link = soup.find('a', string='[Next]')
-            if next_page_link:
-                next_page_url = next_page_link.get('href')
-                print(f"Found next page: {next_page_url}")
-            else:
-                next_page_url = None  # No more pages to scrape
 
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+def scrape_all_posts(base_url, max_posts=None, max_workers=1, state_file=None, incremental=False, index=None,
+                     compress=False):
+    """
+    Scrape all posts, navigating through a list of links on each page and preserving the format and images.
 
-    print(f"Scraping complete. Total posts scraped: {post_counter}")
-    return all_posts
+    Up to `max_workers` posts are downloaded at once while the next page of links is
+    fetched; posts are returned in the order they were listed.
+
+    With a `state_file`, the crawl is checkpointed after every post and a re-run
+    resumes where the previous one stopped; `incremental` stops at posts scraped by
+    an earlier run. `max_posts` counts posts scraped in this run only, and the
+    returned list holds every record in the state file. Search results often link the
+    same post from several pages; it is only fetched once. An `index` (PostIndex)
+    records which posts are new or changed. With `compress`, posts are kept as
+    compressed PostRecords (see blogs.records). See blogs.engine.crawl.
+    """
+    return list(iter_all_posts(base_url, max_posts=max_posts, max_workers=max_workers,
+                               state_file=state_file, incremental=incremental, index=index, compress=compress))
 
 
 def save_to_pdf_with_formatting(posts, filename='scraped_posts.pdf'):
     """
     Save scraped posts to a PDF, preserving the HTML format and images.
     """
+    # Imported here so runs that never render do not pay for loading the renderer
+    from weasyprint import HTML
+
     try:
         print("Generating HTML content for the PDF...")
 
-        # Start generating the combined HTML
-        html_content = '<html><body>'
-        for i, post in enumerate(posts, start=1):
-            html_content += f"<h1>{post['title']}</h1>"
-            html_content += f"<p><a href='{post['url']}'>Original Post URL</a></p>"
-            html_content += post['first_p_html']  # Include the raw HTML of the first <p>
-            html_content += post['second_p_html']  # Include the raw HTML of the second <p>
-            html_content += '<hr>'  # Add a separator between posts
-            print(f"Added post {i}/{len(posts)} to the HTML content.")
-
-        html_content += '</body></html>'
+        # Generate the combined HTML, including the raw HTML of the first two <p> tags
+        html_content = build_posts_html(posts, fields=('first_p_html', 'second_p_html'))
+        print(f"Added {len(posts)} posts to the HTML content.")
 
         # Convert the HTML content to a PDF
         print("Converting HTML to PDF...")
@@ -123,15 +80,46 @@ def main():
     # Limit the number of posts to scrape
     max_posts = 130
 
-    # Scrape posts
-    posts = scrape_all_posts(base_url, max_posts=max_posts)
+    # Number of posts to download at once
+    max_workers = 8
+
+    # Checkpoint progress so an interrupted crawl can be resumed; incremental runs
+    # stop once they reach posts scraped by an earlier run
+    state_file = 'scraped_posts_state.json'
+    incremental = True
+
+    # At most 4 requests a second per host, or less if robots.txt asks for it
+    scheduler = HostScheduler(rate=4, burst=max_workers)
+    configure(scheduler=scheduler)
+
+    # Per-stage timings: one JSON line per request and stage, and a Prometheus snapshot at the end
+    metrics = configure_metrics(log_path='scrape_metrics.jsonl', prometheus_path='scrape_metrics.prom')
 
-    if not posts:
-        print("No posts scraped.")
-        return
+    # Scrape posts lazily: earlier runs' posts first, then new ones as they are extracted.
+    # Posts are kept compressed, as the checkpoint holds every post in memory.
+    posts = iter_all_posts(base_url, max_posts=max_posts, max_workers=max_workers,
+                           state_file=state_file, incremental=incremental,
+                           index=PostIndex('post_index.sqlite'), compress=True)
+
+    # Download images once, downscaled for print, so WeasyPrint renders from local files
+    posts = localize_images(posts, fields=('first_p_html', 'second_p_html'), store=ImageStore('image_cache'))
+
+    # Save to PDF in batches of 25 posts, each rendered as soon as it is full; batches
+    # whose posts have not changed since the last export are reused from pdf_parts. The
+    # search index makes them searchable with 'python blogs/search.py query <words>'.
+    try:
+        with SearchSink('post_search.sqlite') as search, \
+                PdfBatchSink('scraped_posts.pdf', fields=('first_p_html', 'second_p_html'), batch_size=25,
+                             workers=2, cache_dir='pdf_parts') as pdf:
+            post_count = drain(posts, search, pdf)
+        if not post_count:
+            print("No posts scraped.")
+    except Exception as e:
+        print(f"Error saving to PDF: {e}")
+    print(f"Fetch stats: {scheduler.stats()}")
 
-    # Save to PDF
-    save_to_pdf_with_formatting(posts, filename='scraped_posts.pdf')
+    print(metrics.summary())
+    metrics.close()
 
 
 if __name__ == '__main__':
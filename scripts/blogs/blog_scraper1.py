@@ -1,111 +1,62 @@
-import requests
-from bs4 import BeautifulSoup
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+import os
+import sys
 
+# Make the shared helpers in scripts/common importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def scrape_all_blog_posts(base_url):
+from blogs.engine import iter_posts
+from blogs.profiles import BLOGGER_TEXT
+from blogs.sinks import TextPdfSink, drain
+from common.fetch import configure
+from common.metrics import configure_metrics
+from common.ratelimit import HostScheduler
+
+
+def iter_blog_posts(base_url, max_posts=None, max_workers=1):
     """
-    Scrape all blog posts from the website, navigating through pages using 'Older Posts' links.
+    Yield blog posts as they are scraped, navigating through pages using 'Older Posts' links.
 
     Args:
         base_url (str): Base URL of the blog.
+        max_posts (int, optional): Stop after this many posts. Default is None (scrape all posts).
+        max_workers (int): Number of posts to download concurrently. Default is 1.
 
-    Returns:
-        list: List of dictionaries containing post titles, contents, and URLs.
+    Yields:
+        dict: Post title, content (paragraphs separated by blank lines) and URL, in listing order.
     """
-    blog_posts = []
-    next_page_url = base_url  # Start with the base URL
-    post_counter = 0  # Initialize a counter to track the number of posts scraped
-
-    try:
-        while next_page_url:
-            # Send a GET request to the current page
-            response = requests.get(next_page_url)
-            response.raise_for_status()
-
-            # Parse the HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Scrape posts on the current page
-            post_links = soup.find_all('h3', class_='post-title entry-title')
+    return iter_posts(BLOGGER_TEXT, base_url, max_posts=max_posts, max_workers=max_workers)
 
-            for post in post_links:
-                # Extract the post URL
-                post_url = post.find('a').get('href')
 
-                # Fetch individual post
-                post_response = requests.get(post_url)
-                post_response.raise_for_status()
-                post_soup = BeautifulSoup(post_response.text, 'html.parser')
-
-                # Extract title
-                title = post_soup.find('h3', class_='post-title entry-title').get_text(strip=True)
-
-                # Extract content
-                content_div = post_soup.find('div', class_='post-body entry-content')
-                content = content_div.get_text(strip=True) if content_div else "No content found"
-
-                # Add the post details to the list
-                blog_posts.append({
-                    'title': title,
-                    'content': content,
-                    'url': post_url
-                })
-
-                # Increment counter and log progress
-                post_counter += 1
-                print(f"Scraped {post_counter} posts so far...")
-
-            # Find the 'Older Posts' link to navigate to the next page
-            older_posts_link = soup.find('a', id='Blog1_blog-pager-older-link')
-            if older_posts_link:
-                next_page_url = older_posts_link.get('href')
-            else:
-                next_page_url = None  # No more pages to scrape
+def scrape_all_blog_posts(base_url, max_posts=None, max_workers=1):
+    """
+    Scrape all blog posts from the website, navigating through pages using 'Older Posts' links.
 
-    except requests.RequestException as e:
-        print(f"Error fetching blog posts: {e}")
+    Args:
+        base_url (str): Base URL of the blog.
+        max_posts (int, optional): Maximum number of posts to scrape. Default is None (scrape all posts).
+        max_workers (int): Number of posts to download concurrently. Default is 1.
 
-    print(f"Scraping complete. Total posts scraped: {post_counter}")
-    return blog_posts
+    Returns:
+        list: List of dictionaries containing post titles, contents, and URLs.
+    """
+    return list(iter_blog_posts(base_url, max_posts=max_posts, max_workers=max_workers))
 
 
-def save_to_pdf(blog_posts, filename='all_blog_posts1.pdf'):
+def save_to_pdf(blog_posts, filename='all_blog_posts1.pdf', shard_size=200, workers=1):
     """
-    Save blog posts to a PDF file.
+    Save blog posts to a PDF file, one paragraph per paragraph of each post, with a table of contents.
 
     Args:
         blog_posts (list): List of blog post dictionaries.
         filename (str): Output PDF filename.
+        shard_size (int): Posts laid out per shard. Default is 200.
+        workers (int): Number of processes laying out shards. Default is 1.
     """
-    try:
-        # Create PDF document
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-
-        # Get sample stylesheet
-        styles = getSampleStyleSheet()
-
-        # List to hold PDF content
-        story = []
-
-        # Add each blog post to the PDF
-        for post in blog_posts:
-            # Add title
-            story.append(Paragraph(post['title'], styles['Title']))
-
-            # Add URL
-            story.append(Paragraph(f"URL: {post['url']}", styles['Italic']))
+    # Imported here so runs that never render do not pay for loading the renderer
+    from blogs.text_export import save_text_pdf
 
-            # Add content
-            story.append(Paragraph(post['content'], styles['Normal']))
-
-            # Add spacer between posts
-            story.append(Spacer(1, 12))
-
-        # Build PDF
-        doc.build(story)
+    try:
+        save_text_pdf(blog_posts, filename, text_field='content', shard_size=shard_size, workers=workers)
 
         print(f"Blog posts saved to {filename}")
 
@@ -117,15 +68,31 @@ def main():
     # Base URL of the blog
     base_url = 'http://blog.theswca.com'
 
-    # Scrape all blog posts
-    blog_posts = scrape_all_blog_posts(base_url)
+    # Number of posts to download at once
+    max_workers = 8
+
+    # At most 4 requests a second per host, or less if robots.txt asks for it
+    scheduler = HostScheduler(rate=4, burst=max_workers)
+    configure(scheduler=scheduler)
 
-    if not blog_posts:
-        print("No blog posts found.")
-        return
+    # Per-stage timings: one JSON line per request and stage, and a Prometheus snapshot at the end
+    metrics = configure_metrics(log_path='scrape_metrics.jsonl', prometheus_path='scrape_metrics.prom')
+
+    # Scrape all blog posts; every 200 posts are laid out as a shard on one of 2 processes
+    # while the crawl goes on, then merged behind a table of contents
+    try:
+        with TextPdfSink('all_blog_posts1.pdf', shard_size=200, workers=2) as pdf:
+            post_count = drain(iter_blog_posts(base_url, max_workers=max_workers), pdf)
+        print(f"Fetch stats: {scheduler.stats()}")
+        if post_count:
+            print(f"{post_count} blog posts saved to all_blog_posts1.pdf")
+        else:
+            print("No blog posts found.")
+    except Exception as e:
+        print(f"Error saving to PDF: {e}")
 
-    # Save to PDF
-    save_to_pdf(blog_posts)
+    print(metrics.summary())
+    metrics.close()
 
 
 if __name__ == '__main__':
@@ -1,122 +1,79 @@
 import os
+import sys
 import time
-import requests
-from bs4 import BeautifulSoup
-from weasyprint import HTML
 
+# Make the shared helpers in scripts/common importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def scrape_all_blog_posts(base_url, max_posts=None):
+from blogs.engine import iter_posts
+from blogs.images import ImageStore, localize_images
+from blogs.pdf_export import build_posts_html
+from blogs.post_index import PostIndex
+from blogs.profiles import BLOGGER_HTML
+from blogs.sinks import JsonLinesSink, PdfBatchSink, SearchSink, drain
+from common.cache import ResponseCache
+from common.fetch import configure
+from common.metrics import configure_metrics
+from common.ratelimit import HostScheduler
+
+
+def iter_blog_posts(base_url, max_posts=None, max_workers=1, index=None, compress=False):
+    """
+    Yield blog posts as they are scraped, navigating through pages using 'Older Posts' links.
+
+    Takes the same arguments as scrape_all_blog_posts. Each post is yielded as soon as
+    it is extracted, so it can be exported while later posts are still downloading.
+
+    Yields:
+        dict or PostRecord: Post title, HTML content and URL, in listing order.
+    """
+    return iter_posts(BLOGGER_HTML, base_url, max_posts=max_posts, max_workers=max_workers, index=index,
+                      compress=compress)
+
+
+def scrape_all_blog_posts(base_url, max_posts=None, max_workers=1, index=None, compress=False):
     """
     Scrape all blog posts from the website, navigating through pages using 'Older Posts' links.
 
+    Posts are downloaded on a pool of `max_workers` threads while the listing pages are
+    walked, so the next page is fetched while the current page's posts are in flight.
+
     Args:
         base_url (str): Base URL of the blog.
         max_posts (int, optional): Maximum number of posts to scrape. Default is None (scrape all posts).
+        max_workers (int): Number of posts to download concurrently. Default is 1.
+        index (PostIndex, optional): Index recording which posts are new or changed since the last run.
+        compress (bool): Keep posts as compressed PostRecords, which hold large blogs in a
+            fraction of the memory. Default is False.
 
     Returns:
-        list: List of dictionaries containing post titles, HTML content, and URLs.
+        list: List of dictionaries containing post titles, HTML content, and URLs, in listing order.
     """
-    blog_posts = []
-    next_page_url = base_url  # Start with the base URL
-    post_counter = 0  # Initialize a counter to track the number of posts scraped
-
-    try:
-        while next_page_url:
-            # Send a GET request to the current page
-            try:
-                response = requests.get(next_page_url, timeout=10)
-                response.raise_for_status()
-            except requests.RequestException as e:
-                print(f"Error fetching page {next_page_url}: {e}")
-                break
-
-            # Parse the HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Scrape posts on the current page
-            post_links = soup.find_all('h3', class_='post-title entry-title')
-
-            if not post_links:
-                print(f"No posts found on page {next_page_url}. Exiting...")
-                break
-
-            for post in post_links:
-                # Extract the post URL
-                post_url = post.find('a').get('href')
-                try:
-                    post_response = requests.get(post_url, timeout=10)
-                    post_response.raise_for_status()
-                except requests.RequestException as e:
-                    print(f"Error fetching post {post_url}: {e}")
-                    continue
-
-                post_soup = BeautifulSoup(post_response.text, 'html.parser')
-
-                # Extract title
-                title = post_soup.find('h3', class_='post-title entry-title').get_text(strip=True)
-
-                # Extract content (HTML format)
-                content_div = post_soup.find('div', class_='post-body entry-content')
-                content_html = str(content_div) if content_div else "<p>No content found</p>"
-
-                # Add the post details to the list
-                blog_posts.append({
-                    'title': title,
-                    'content_html': content_html,
-                    'url': post_url
-                })
-
-                # Increment counter and log progress
-                post_counter += 1
-                print(f"Scraped {post_counter} posts so far...")
-
-                # Stop if we've reached the max_posts limit
-                if max_posts and post_counter >= max_posts:
-                    print(f"Reached max posts limit of {max_posts}. Stopping...")
-                    return blog_posts
-
-            # Break the loop if no more pages are available or max_posts is reached
-            if max_posts and post_counter >= max_posts:
-                break
-
-            # Find the 'Older Posts' link to navigate to the next page
-            older_posts_link = soup.find('a', id='Blog1_blog-pager-older-link')
-            if older_posts_link:
-                next_page_url = older_posts_link.get('href')
-            else:
-                next_page_url = None  # No more pages to scrape
-
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-
-    print(f"Scraping complete. Total posts scraped: {post_counter}")
-    return blog_posts
-
+    return list(iter_blog_posts(base_url, max_posts=max_posts, max_workers=max_workers, index=index,
+                                compress=compress))
 
 
 def save_to_pdf_with_formatting(blog_posts, filename='all_blog_posts2.pdf'):
     """
     Save blog posts to a PDF file, preserving HTML formatting and images.
 
+    The whole document is rendered in one pass; use save_to_pdf_streaming for large
+    blogs to keep memory bounded.
+
     Args:
         blog_posts (list): List of blog post dictionaries.
         filename (str): Output PDF filename.
     """
+    # Imported here so runs that never render do not pay for loading the renderer
+    from weasyprint import HTML
+
     try:
         print("Starting to generate HTML content for the PDF...")
 
         start_time = time.time()
-        
-        # Create HTML content for all posts
-        html_content = '<html><body>'
-        for i, post in enumerate(blog_posts, start=1):
-            html_content += f"<h1>{post['title']}</h1>"
-            html_content += f"<p><a href='{post['url']}'>Original Post URL</a></p>"
-            html_content += post['content_html']
-            html_content += '<hr>'  # Separator between posts
-            print(f"Added post {i}/{len(blog_posts)} to the HTML content.")
 
-        html_content += '</body></html>'
+        # Create HTML content for all posts
+        html_content = build_posts_html(blog_posts, fields=('content_html',))
 
         html_generation_time = time.time() - start_time  # Time taken for HTML generation
         print(f"HTML content generation complete. Time taken: {html_generation_time:.2f} seconds.")
@@ -132,35 +89,6 @@ def save_to_pdf_with_formatting(blog_posts, filename='all_blog_posts2.pdf'):
     except Exception as e:
         print(f"Error saving to PDF: {e}")
 
-    """
-    Save blog posts to a PDF file, preserving HTML formatting and images.
-
-    Args:
-        blog_posts (list): List of blog post dictionaries.
-        filename (str): Output PDF filename.
-    """
-    try:
-        # Create HTML content for all posts
-        html_content = '<html><body>'
-        for post in blog_posts:
-            html_content += f"<h1>{post['title']}</h1>"
-            html_content += f"<p><a href='{post['url']}'>Original Post URL</a></p>"
-            html_content += post['content_html']
-            html_content += '<hr>'  # Separator between posts
-        html_content += '</body></html>'
-
-        options = {
-            'zoom': 0.8,
-            'enable_javascript': False,
-        }
-
-        # Convert the HTML content to a PDF
-        HTML(string=html_content).write_pdf(filename)
-        print(f"Blog posts saved to {filename}")
-
-    except Exception as e:
-        print(f"Error saving to PDF: {e}")
-
 
 def main():
     # Base URL of the blog
@@ -169,15 +97,44 @@ def main():
     # Limit posts
     max_posts = 30
 
-    # Scrape all blog posts
-    blog_posts = scrape_all_blog_posts(base_url, max_posts=max_posts)
+    # Number of posts to download at once
+    max_workers = 8
+
+    # Reuse responses from earlier runs; set offline to True to never touch the network
+    offline = False
+
+    # At most 4 requests a second per host, or less if robots.txt asks for it
+    scheduler = HostScheduler(rate=4, burst=max_workers)
+    configure(cache=ResponseCache('http_cache.sqlite'), cache_only=offline, scheduler=scheduler)
+
+    # Per-stage timings: one JSON line per request and stage, and a Prometheus snapshot at the end
+    metrics = configure_metrics(log_path='scrape_metrics.jsonl', prometheus_path='scrape_metrics.prom')
 
-    if not blog_posts:
-        print("No blog posts found.")
-        return
+    # Scrape blog posts lazily; each post is exported while the next ones download. Posts
+    # are kept compressed while they wait in the PDF batches.
+    blog_posts = iter_blog_posts(base_url, max_posts=max_posts, max_workers=max_workers,
+                                 index=PostIndex('post_index.sqlite'), compress=True)
+
+    # Download images once, downscaled for print, so WeasyPrint renders from local files
+    blog_posts = localize_images(blog_posts, fields=('content_html',), store=ImageStore('image_cache'))
+
+    # Save to PDF with formatting, rendering 10 posts per batch on 2 processes as soon as
+    # each batch is full; batches whose posts have not changed since the last export are
+    # reused from pdf_parts. A JSON Lines copy keeps the posts for other tools, and the
+    # search index makes them searchable with 'python blogs/search.py query <words>'.
+    try:
+        with JsonLinesSink('all_blog_posts2.jsonl') as jsonl, SearchSink('post_search.sqlite') as search, \
+                PdfBatchSink('all_blog_posts2.pdf', fields=('content_html',), batch_size=10, workers=2,
+                             cache_dir='pdf_parts') as pdf:
+            post_count = drain(blog_posts, jsonl, search, pdf)
+        if not post_count:
+            print("No blog posts found.")
+    except Exception as e:
+        print(f"Error saving to PDF: {e}")
+    print(f"Fetch stats: {scheduler.stats()}")
 
-    # Save to PDF with formatting
-    save_to_pdf_with_formatting(blog_posts)
+    print(metrics.summary())
+    metrics.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,98 @@
+import json
+import os
+
+
+def records_path(path):
+    """
+    Return the JSON Lines file holding the records of the state file at `path`.
+
+    'scraped_posts_state.json' keeps its records in 'scraped_posts_state.records.jsonl'.
+    """
+    return f"{os.path.splitext(path)[0]}.records.jsonl"
+
+
+class CrawlState:
+    """
+    Checkpoint of a crawl kept in a JSON state file so an interrupted run can resume.
+
+    The state holds the pagination cursor (the listing page the last scraped post came
+    from), the set of post URLs already scraped and the extracted records themselves.
+    A cursor of None means the last run reached the end of the listing.
+
+    The records are appended to a JSON Lines file next to the state file (see
+    records_path), so saving after every post only writes the new records. The state
+    file itself holds the cursor and the length of the records file at the last save;
+    lines appended after it, e.g. by a run killed between the two writes, are dropped
+    on the next save. State files that still hold their records are read as well and
+    moved to the records file on the first save.
+
+    Args:
+        path (str): Location of the state file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records_path = records_path(path)
+        self.next_page_url = None
+        self.visited = set()
+        self.records = []
+        self._saved_records = 0  # Records already in the records file
+        self._saved_bytes = 0  # Length of the records file at the last save
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the state saved at `path`, or return an empty state if there is none yet.
+        """
+        state = cls(path)
+        if not os.path.exists(path):
+            return state
+
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        state.next_page_url = data.get('next_page_url')
+        if 'records' in data:
+            # Written before records had their own file; they are moved there on save()
+            state.records = data['records']
+        elif os.path.exists(state.records_path):
+            with open(state.records_path, 'rb') as f:
+                committed = f.read(data.get('records_bytes', 0))
+            state.records = [json.loads(line) for line in committed.splitlines() if line.strip()]
+            state._saved_records = len(state.records)
+            state._saved_bytes = len(committed)
+        state.visited = set(data.get('visited', ())) | {record['url'] for record in state.records}
+        return state
+
+    def add(self, page_url, record):
+        """
+        Record a scraped post and move the cursor to the listing page it came from.
+        """
+        self.next_page_url = page_url
+        self.visited.add(record['url'])
+        self.records.append(record)
+
+    def save(self):
+        """
+        Append the new records, then write the state file atomically.
+
+        The state file only counts the records once they are written, so a crash
+        mid-save never corrupts the previous checkpoint.
+        """
+        with open(self.records_path, 'ab') as f:
+            # Drops anything appended after the last completed save
+            f.truncate(self._saved_bytes)
+            for record in self.records[self._saved_records:]:
+                # PostRecords are written as plain dicts
+                f.write(json.dumps(dict(record), ensure_ascii=False).encode('utf-8') + b'\n')
+            records_bytes = f.tell()
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'next_page_url': self.next_page_url,
+                'records_file': os.path.basename(self.records_path),
+                'records_bytes': records_bytes,
+            }, f)
+        os.replace(tmp_path, self.path)
+        self._saved_records = len(self.records)
+        self._saved_bytes = records_bytes
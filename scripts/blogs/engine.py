@@ -0,0 +1,278 @@
+from contextlib import closing
+
+import requests
+
+from blogs.checkpoint import CrawlState
+from blogs.post_index import NEW, UNCHANGED, canonical_url
+from blogs.records import PostRecord
+from common.concurrency import ordered_map, process_pool
+from common.fetch import fetch
+from common.metrics import get_metrics
+from common.parsing import make_soup
+
+
+class ListingError(Exception):
+    """
+    A listing page could not be fetched, so the walk stopped before the end of the listing.
+    """
+
+
+def iter_post_urls(profile, base_url, visited=(), incremental=False):
+    """
+    Yield (page_url, post_url) pairs from each listing page, following the profile's next-page rule.
+
+    A post linked more than once (on several pages, or under URLs that only differ in
+    tracking parameters or fragments) is only yielded the first time.
+
+    Args:
+        profile (SiteProfile): Site the listing pages belong to.
+        base_url (str): First listing page.
+        visited (set): Post URLs to skip.
+        incremental (bool): Stop paginating after the first page that lists a visited
+            post, since everything older has been scraped before. Default is False.
+
+    Yields:
+        tuple: The listing page URL and the post URL.
+
+    Raises:
+        ListingError: If a listing page cannot be fetched. The walk only ends quietly
+            when the next-page rule finds no further page (or a page lists no posts).
+    """
+    next_page_url = base_url  # Start with the base URL
+    seen = set()  # Canonical URLs already yielded in this run
+
+    while next_page_url:
+        # Request the listing page
+        try:
+            response = fetch(next_page_url)
+        except requests.RequestException as e:
+            raise ListingError(f"Error fetching page {next_page_url}: {e}") from e
+
+        soup = make_soup(response.text)
+        post_urls = profile.listing_links(soup, next_page_url)
+
+        if not post_urls:
+            print(f"No posts found on page {next_page_url}. Exiting...")
+            return
+
+        reached_visited = False
+        for post_url in post_urls:
+            if post_url in visited:
+                reached_visited = True
+                continue
+            key = canonical_url(post_url)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield next_page_url, post_url
+
+        if incremental and reached_visited:
+            print(f"Reached previously scraped posts on {next_page_url}. Stopping...")
+            return
+
+        # Find the link to the next page
+        next_page_url = profile.next_page_url(soup, next_page_url)
+        if next_page_url:
+            print(f"Found next page: {next_page_url}")
+
+
+def compact_record(record, compact=False, compress=False):
+    """
+    Return a record as a PostRecord when `compact` or `compress` is set, otherwise unchanged.
+    """
+    if record is None or not (compact or compress):
+        return record
+    return PostRecord.from_dict(record, compress=compress)
+
+
+def extract_post(profile, markup, post_url, compact=False, compress=False):
+    """
+    Parse a post page, building only the profile's parse_only subtrees, and extract its record.
+
+    Kept at module level so it can run in a worker process, which then also does the
+    encoding and compression of a compact record.
+    """
+    record = profile.extract(make_soup(markup, parse_only=profile.parse_only), post_url)
+    return compact_record(record, compact, compress)
+
+
+def scrape_post(profile, post_url, parse_pool=None, compact=False, compress=False):
+    """
+    Fetch a single post and extract the profile's fields from it.
+
+    Args:
+        profile (SiteProfile): Site the post belongs to.
+        post_url (str): URL of the post.
+        parse_pool (ProcessPoolExecutor, optional): Pool to parse in, so CPU-bound
+            parsing does not hold the GIL while other threads are fetching.
+        compact (bool): Return a PostRecord holding the values as UTF-8 bytes. Default is False.
+        compress (bool): Also zlib-compress the larger values; implies compact. Default is False.
+
+    Returns:
+        dict or PostRecord: The post record, or None if the post could not be fetched or lacks a required field.
+    """
+    try:
+        post_response = fetch(post_url)
+    except requests.RequestException as e:
+        print(f"Error fetching post {post_url}: {e}")
+        return None
+
+    metrics = get_metrics()
+    if parse_pool is None:
+        with metrics.stage('parse', bytes=len(post_response.content), url=post_url):
+            soup = make_soup(post_response.text, parse_only=profile.parse_only)
+        with metrics.stage('extract', url=post_url):
+            return compact_record(profile.extract(soup, post_url), compact, compress)
+
+    # Parsing and extraction both happen in the worker, so they are timed together
+    with metrics.stage('parse', bytes=len(post_response.content), url=post_url, pool=True):
+        return parse_pool.submit(extract_post, profile, post_response.text, post_url, compact, compress).result()
+
+
+def crawl(profile, base_url, max_posts=None, max_workers=1, state=None, incremental=False, parse_workers=0,
+          index=None, changed_only=False, compact=False, compress=False):
+    """
+    Crawl a site described by a profile, yielding post records as they are extracted.
+
+    Up to `max_workers` posts are downloaded at once while the next listing page is
+    fetched; records come out in the order the posts were listed.
+
+    With a CrawlState, the pagination cursor, visited post URLs and records are
+    checkpointed after every post and on any exit. A state holding a cursor resumes
+    from that listing page, skipping posts already scraped; once a crawl has reached
+    the end of the listing, the next one starts from `base_url` again. A listing page
+    that cannot be fetched stops the crawl but keeps the cursor, so the next run
+    resumes instead of starting over. `incremental`
+    makes such a fresh crawl stop paginating at the first page holding already
+    scraped posts. Resuming takes precedence over incremental mode.
+
+    With a PostIndex, each post's content hash is compared with the one stored by
+    earlier runs and the post is reported as new, changed or unchanged;
+    `changed_only` then leaves unchanged posts out of the results.
+
+    Args:
+        profile (SiteProfile): Site to crawl.
+        base_url (str): First listing page.
+        max_posts (int, optional): Stop after this many new posts. Default is None (no limit).
+        max_workers (int): Number of posts to download concurrently. Default is 1.
+        state (CrawlState, optional): Checkpoint to resume from and save to.
+        incremental (bool): Stop at previously scraped posts. Default is False.
+        parse_workers (int): Number of processes to parse post pages in. Default is 0
+            (parse on the fetching threads).
+        index (PostIndex, optional): Index to detect changed content with and update.
+        changed_only (bool): Only yield new and changed posts. Needs an index. Default is False.
+        compact (bool): Keep records as PostRecords, with their values as UTF-8 bytes. Default is False.
+        compress (bool): Also zlib-compress the larger values; implies compact. Default is False.
+
+    Yields:
+        dict or PostRecord: Each newly scraped post record.
+    """
+    post_counter = 0
+    status_counts = {}
+    metrics = get_metrics()
+    visited = state.visited if state else set()
+
+    start_url = base_url
+    if state and state.next_page_url:
+        print(f"Resuming crawl from {state.next_page_url} ({len(state.records)} posts already scraped)")
+        start_url = state.next_page_url
+        incremental = False
+
+    # Its workers start on the first submit, from a fetch thread, so they must not be forked
+    parse_pool = process_pool(parse_workers) if parse_workers else None
+
+    try:
+        listing = iter_post_urls(profile, start_url, visited=visited, incremental=incremental)
+        results = ordered_map(
+            lambda entry: (entry[0], scrape_post(profile, entry[1], parse_pool, compact, compress)),
+            listing, max_workers=max_workers
+        )
+        with closing(results):
+            for page_url, post in results:
+                if post is None:
+                    continue
+
+                if state:
+                    state.add(page_url, post)
+                    state.save()
+
+                status = index.observe(post) if index is not None else NEW
+                metrics.count(f"posts_{status}")
+                status_counts[status] = status_counts.get(status, 0) + 1
+
+                post_counter += 1
+                if index is not None:
+                    print(f"Scraped post {post_counter} ({status}): {post['title']}")
+                else:
+                    print(f"Scraped post {post_counter}: {post['title']}")
+                if not (changed_only and status == UNCHANGED):
+                    yield post
+
+                # Stop if we've reached the max_posts limit
+                if max_posts and post_counter >= max_posts:
+                    print(f"Reached max posts limit of {max_posts}. Stopping...")
+                    return
+
+        # The whole listing was walked, so the next crawl starts from the top again
+        if state:
+            state.next_page_url = None
+
+    except ListingError as e:
+        # The cursor stays at the page of the last saved post, so the next run resumes
+        # there instead of taking the failed walk for the end of the listing
+        print(e)
+        if state:
+            print(f"Stopped before the end of the listing; the next run resumes from {state.next_page_url or base_url}")
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+
+    finally:
+        if parse_pool:
+            parse_pool.shutdown(wait=True)
+        if state:
+            state.save()
+
+    print(f"Scraping complete. Total posts scraped: {post_counter}")
+    if index is not None:
+        print(f"New: {status_counts.get('new', 0)}, changed: {status_counts.get('changed', 0)}, "
+              f"unchanged: {status_counts.get('unchanged', 0)}")
+
+
+def iter_posts(profile, base_url, max_posts=None, max_workers=1, state_file=None, incremental=False,
+               parse_workers=0, index=None, changed_only=False, compact=False, compress=False):
+    """
+    Yield a site's posts as they are extracted, so export can start before the crawl ends.
+
+    With a `state_file`, the records scraped by earlier runs are yielded first,
+    followed by the new ones. See crawl for the arguments; closing the generator
+    stops the crawl and saves the checkpoint.
+
+    Yields:
+        dict or PostRecord: Post records in listing order.
+    """
+    state = CrawlState.load(state_file) if state_file else None
+    if state:
+        # Records read back from the state file are kept as compact as new ones
+        state.records = [compact_record(record, compact, compress) for record in state.records]
+        # A copy, since the crawl appends to state.records as it goes
+        yield from list(state.records)
+    yield from crawl(profile, base_url, max_posts=max_posts, max_workers=max_workers,
+                     state=state, incremental=incremental, parse_workers=parse_workers,
+                     index=index, changed_only=changed_only, compact=compact, compress=compress)
+
+
+def scrape_all(profile, base_url, max_posts=None, max_workers=1, state_file=None, incremental=False,
+               parse_workers=0, index=None, changed_only=False, compact=False, compress=False):
+    """
+    Crawl a site and return its posts as a list. See iter_posts for the arguments.
+
+    With a `state_file`, the returned list holds every record in the state, including
+    those scraped by earlier runs.
+
+    Returns:
+        list: Post records in listing order.
+    """
+    return list(iter_posts(profile, base_url, max_posts=max_posts, max_workers=max_workers,
+                           state_file=state_file, incremental=incremental, parse_workers=parse_workers,
+                           index=index, changed_only=changed_only, compact=compact, compress=compress))
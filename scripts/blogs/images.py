@@ -0,0 +1,174 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from blogs.records import PostRecord
+from common.concurrency import ordered_map
+from common.fetch import fetch
+from common.metrics import get_metrics
+
+
+class ImageStore:
+    """
+    Local image store that feeds PDF rendering with downscaled, deduplicated copies.
+
+    Each image is downloaded once, scaled down so it is no wider than the page content
+    at `target_dpi`, recompressed, and saved under the SHA-256 hash of the original
+    bytes, so the same picture served from several URLs is stored once. The URL to file
+    mapping is kept in an index file so later runs skip the download entirely.
+
+    Args:
+        directory (str): Folder holding the images and the index. Default is 'image_cache'.
+        target_dpi (int): Resolution the images are prepared for. Default is 150.
+        content_width_in (float): Printable page width in inches. Default is 6.5 (letter/A4 with margins).
+        jpeg_quality (int): Quality used when recompressing photos. Default is 80.
+    """
+
+    def __init__(self, directory='image_cache', target_dpi=150, content_width_in=6.5, jpeg_quality=80):
+        self.directory = directory
+        self.max_width = int(target_dpi * content_width_in)
+        self.jpeg_quality = jpeg_quality
+        self.index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                self._index = json.load(f)
+
+    def get(self, url):
+        """
+        Return the local path of an image, downloading and processing it if needed,
+        or None if it could not be fetched.
+        """
+        with self._lock:
+            filename = self._index.get(url)
+        if filename and os.path.exists(os.path.join(self.directory, filename)):
+            return os.path.join(self.directory, filename)
+
+        try:
+            response = fetch(url)
+        except requests.RequestException as e:
+            print(f"Error fetching image {url}: {e}")
+            return None
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        with get_metrics().stage('image', bytes=len(response.content), url=url):
+            filename = self._store(digest, response.content)
+
+        with self._lock:
+            self._index[url] = filename
+        return os.path.join(self.directory, filename)
+
+    def _store(self, digest, data):
+        """
+        Save downscaled image bytes under their content hash, unless already stored.
+        """
+        for existing in (f"{digest}.jpg", f"{digest}.png", f"{digest}.img"):
+            if os.path.exists(os.path.join(self.directory, existing)):
+                return existing
+
+        filename, output = self._downscale(digest, data)
+
+        # Write to a temporary file first, since several threads may store the same image
+        tmp_path = os.path.join(self.directory, f"{filename}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(output)
+        os.replace(tmp_path, os.path.join(self.directory, filename))
+        return filename
+
+    def _downscale(self, digest, data):
+        """
+        Return (filename, bytes) for the image resized to max_width and recompressed.
+        Formats Pillow cannot read (e.g. SVG) are kept as they are.
+        """
+        from PIL import Image
+
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except Exception:
+            return f"{digest}.img", data
+
+        source_format = image.format
+        if image.width > self.max_width:
+            height = max(1, round(image.height * self.max_width / image.width))
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+
+        output = io.BytesIO()
+        if image.mode in ('RGBA', 'LA', 'P') or source_format == 'PNG':
+            image.save(output, format='PNG', optimize=True)
+            return f"{digest}.png", output.getvalue()
+
+        image.convert('RGB').save(output, format='JPEG', quality=self.jpeg_quality, optimize=True)
+        return f"{digest}.jpg", output.getvalue()
+
+    def save_index(self):
+        with self._lock:
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+
+    def localize_html(self, html_fragment, page_url):
+        """
+        Rewrite every <img> in an HTML fragment to point at its local copy.
+
+        Relative sources are resolved against `page_url`. Images that cannot be fetched
+        keep their original source.
+        """
+        soup = BeautifulSoup(html_fragment, 'html.parser')
+        images = soup.find_all('img', src=True)
+        if not images:
+            return html_fragment
+
+        for img in images:
+            local_path = self.get(urljoin(page_url, img['src']))
+            if local_path:
+                img['src'] = Path(local_path).resolve().as_uri()
+                # A srcset would make WeasyPrint go back to the remote full-size images
+                img.attrs.pop('srcset', None)
+
+        return str(soup)
+
+    def localize_post(self, post, fields):
+        """
+        Return a copy of a post with the images in the given HTML fields made local.
+
+        A PostRecord comes back as a PostRecord, compressed like the original.
+        """
+        localized = {field: self.localize_html(post[field], post['url']) for field in fields}
+        if isinstance(post, PostRecord):
+            return post.replace(**localized)
+        return {**post, **localized}
+
+
+def localize_images(posts, fields, store, max_workers=8):
+    """
+    Prefetch the images of each post concurrently and rewrite their sources to local files.
+
+    Posts are processed lazily on a thread pool and yielded in their original order,
+    so this can sit between a crawl and save_to_pdf_streaming without holding every
+    post in memory. The store's index is saved once all posts have been processed.
+
+    Args:
+        posts (iterable): Post dictionaries with a 'url' key and the keys in `fields`.
+        fields (tuple): Keys of the HTML fragments to rewrite.
+        store (ImageStore): Where images are downloaded to.
+        max_workers (int): Number of posts processed at once. Default is 8.
+
+    Yields:
+        dict: Each post with its <img> sources pointing at local files.
+    """
+    try:
+        yield from ordered_map(lambda post: store.localize_post(post, fields), posts, max_workers=max_workers)
+    finally:
+        store.save_index()
@@ -0,0 +1,250 @@
+import hashlib
+import html
+import os
+import tempfile
+import time
+from contextlib import closing
+from itertools import islice
+
+from blogs.records import fragment_bytes
+from common.concurrency import ordered_map, process_pool
+from common.metrics import get_metrics
+
+
+def build_posts_html(posts, fields):
+    """
+    Build one HTML document for a group of posts.
+
+    Args:
+        posts (iterable): Post dictionaries with 'title' and 'url' keys.
+        fields (tuple): Keys of the raw HTML fragments to include for each post, in order.
+
+    Returns:
+        str: The complete HTML document.
+    """
+    parts = ['<html><body>']
+    for post in posts:
+        parts.append(f"<h1>{html.escape(post['title'])}</h1>")
+        parts.append(f"<p><a href='{html.escape(post['url'], quote=True)}'>Original Post URL</a></p>")
+        parts.extend(post[field] for field in fields)
+        parts.append('<hr>')  # Separator between posts
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def build_posts_document(posts, fields):
+    """
+    Build the same document as build_posts_html, as UTF-8 bytes.
+
+    Fragments of PostRecords are copied into the document as the bytes they are
+    stored as, so large posts are never decoded to str just to be encoded again.
+
+    Returns:
+        bytes: The complete HTML document.
+    """
+    parts = [b'<html><body>']
+    for post in posts:
+        parts.append(f"<h1>{html.escape(post['title'])}</h1>".encode('utf-8'))
+        parts.append(f"<p><a href='{html.escape(post['url'], quote=True)}'>Original Post URL</a></p>".encode('utf-8'))
+        parts.extend(fragment_bytes(post, field) for field in fields)
+        parts.append(b'<hr>')  # Separator between posts
+    parts.append(b'</body></html>')
+    return b''.join(parts)
+
+
+def iter_batches(items, batch_size):
+    """
+    Yield lists of up to `batch_size` items, pulling lazily from `items`.
+    """
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_stable_batches(posts, batch_size):
+    """
+    Yield batches of posts whose boundaries depend on the posts, not on their positions.
+
+    A batch ends after a post whose URL hash falls in a 1-in-`batch_size` bucket, or
+    once it holds twice `batch_size` posts. Adding or removing a post then only
+    changes the batch it is in, so every other batch renders to the same PDF as before.
+    """
+    batch = []
+    for post in posts:
+        batch.append(post)
+        bucket = int(hashlib.sha256(post['url'].encode('utf-8')).hexdigest()[:8], 16) % batch_size
+        if bucket == 0 or len(batch) >= 2 * batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def render_pdf(job):
+    """
+    Render one HTML document to a PDF file. May run in a worker process.
+
+    Args:
+        job (tuple): (html_content, output_path). The HTML may be a str or UTF-8 bytes.
+
+    Returns:
+        float: Seconds spent rendering.
+    """
+    # Imported here so worker processes and callers that never render stay light
+    from weasyprint import HTML
+
+    html_content, output_path = job
+    start_time = time.time()
+    if isinstance(html_content, bytes):
+        document = HTML(string=html_content, encoding='utf-8')
+    else:
+        document = HTML(string=html_content)
+    document.write_pdf(output_path)
+    return time.time() - start_time
+
+
+def render_cached_pdf(job):
+    """
+    Render a job unless its output already exists. May run in a worker process.
+
+    The PDF is written under a temporary name first, so an interrupted render never
+    leaves a truncated file behind to be reused.
+
+    Returns:
+        float: Seconds spent rendering, or None if the cached PDF was reused.
+    """
+    html_content, output_path = job
+    if os.path.exists(output_path):
+        return None
+    tmp_path = f"{output_path}.tmp"
+    render_time = render_pdf((html_content, tmp_path))
+    os.replace(tmp_path, output_path)
+    return render_time
+
+
+def merge_pdfs(part_paths, filename):
+    """
+    Concatenate PDF files into `filename`, in order.
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part_path in part_paths:
+        writer.append(part_path)
+    with open(filename, 'wb') as f:
+        writer.write(f)
+    writer.close()
+
+
+def parts_cache_dir(cache_dir, filename):
+    """
+    Return the subfolder of `cache_dir` holding the cached batches of one output file.
+
+    It is named after the file and a hash of its full path, e.g.
+    'pdf_parts/all_blog_posts2-3f2a9c1d', so outputs with the same name in different
+    folders are kept apart too.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    digest = hashlib.sha256(os.path.abspath(filename).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{stem}-{digest}")
+
+
+def save_to_pdf_streaming(posts, filename, fields=('content_html',), batch_size=25, workers=1, cache_dir=None):
+    """
+    Save posts to a PDF by rendering them in fixed-size batches and merging the results.
+
+    Only `batch_size` posts are turned into HTML and laid out by WeasyPrint at a time,
+    so peak memory stays bounded however many posts there are. `posts` can be a
+    generator and is consumed lazily. With `workers` > 1 the batches are rendered in
+    parallel worker processes; otherwise they are rendered on a background thread
+    while the next batch is built. Each batch's render time is printed as it completes.
+
+    With a `cache_dir`, each batch's PDF is kept there under the hash of its HTML and
+    reused by later exports, so only batches whose posts changed are rendered again.
+    Batches are then cut at content-defined boundaries (see iter_stable_batches), so
+    a new post does not shift every batch after it. Each output file keeps its parts
+    in its own subfolder (see parts_cache_dir), from which parts no longer used are
+    removed, so exports sharing a `cache_dir` never delete each other's parts.
+
+    Args:
+        posts (iterable): Post records (dicts or PostRecords) with 'title', 'url' and the keys in `fields`.
+        filename (str): Output PDF filename.
+        fields (tuple): Keys of the raw HTML fragments to include for each post.
+        batch_size (int): Number of posts rendered per batch. Default is 25.
+        workers (int): Number of rendering processes. Default is 1 (render on a thread in this process).
+        cache_dir (str, optional): Folder to keep rendered batches in between exports.
+            Can be shared by several outputs.
+
+    Returns:
+        int: Number of posts written.
+    """
+    output_dir = os.path.dirname(os.path.abspath(filename))
+    metrics = get_metrics()
+    start_time = time.time()
+    total_posts = 0
+
+    if cache_dir:
+        cache_dir = parts_cache_dir(cache_dir, filename)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix='.pdf_parts_') as parts_dir:
+        part_paths = []
+        batch_sizes = []
+
+        def jobs():
+            batches = iter_stable_batches(posts, batch_size) if cache_dir else iter_batches(posts, batch_size)
+            for index, batch in enumerate(batches):
+                with metrics.stage('build_html', posts=len(batch)):
+                    html_content = build_posts_document(batch, fields)
+                if cache_dir:
+                    digest = hashlib.sha256(html_content).hexdigest()
+                    part_path = os.path.join(cache_dir, f"{digest}.pdf")
+                else:
+                    part_path = os.path.join(parts_dir, f"part_{index:05d}.pdf")
+                part_paths.append(part_path)
+                batch_sizes.append(len(batch))
+                yield html_content, part_path
+
+        # A single worker renders on a background thread, overlapping with HTML building
+        executor = process_pool(workers) if workers > 1 else None
+        try:
+            timings = ordered_map(render_cached_pdf if cache_dir else render_pdf, jobs(),
+                                  max_workers=workers, executor=executor)
+            with closing(timings):
+                for index, render_time in enumerate(timings):
+                    total_posts += batch_sizes[index]
+                    if render_time is None:
+                        metrics.count('render_reused')
+                        print(f"Reused batch {index + 1} ({batch_sizes[index]} posts, "
+                              f"{total_posts} total) from {cache_dir}.")
+                    else:
+                        # Rendering may run in a worker process, so it is timed there and recorded here
+                        metrics.observe('render', render_time, batch=index, posts=batch_sizes[index])
+                        print(f"Rendered batch {index + 1} ({batch_sizes[index]} posts, "
+                              f"{total_posts} total). Time taken: {render_time:.2f} seconds.")
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+        if not part_paths:
+            print("No posts to save.")
+            return 0
+
+        merge_start = time.time()
+        with metrics.stage('merge', batches=len(part_paths)):
+            merge_pdfs(part_paths, filename)
+        print(f"Merged {len(part_paths)} batches into {filename}. "
+              f"Time taken: {time.time() - merge_start:.2f} seconds.")
+
+        if cache_dir:
+            # Batches that are no longer part of the document will not be asked for again
+            current = {os.path.basename(path) for path in part_paths}
+            for name in os.listdir(cache_dir):
+                if name.endswith('.pdf') and name not in current:
+                    os.remove(os.path.join(cache_dir, name))
+
+    print(f"PDF generation complete. Total time taken: {time.time() - start_time:.2f} seconds.")
+    return total_posts
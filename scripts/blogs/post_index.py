@@ -0,0 +1,123 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid')
+
+NEW, CHANGED, UNCHANGED = 'new', 'changed', 'unchanged'
+
+
+def canonical_url(url):
+    """
+    Normalize a post URL so the same post linked in different ways maps to one key.
+
+    The scheme and host are lowercased, default ports, fragments and tracking
+    parameters are dropped, and the remaining query parameters are sorted.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ''
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in TRACKING_PARAMS)
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def content_hash(record):
+    """
+    Return a SHA-256 hex digest of a post record's extracted fields, ignoring its URL.
+    """
+    content = {key: value for key, value in record.items() if key != 'url'}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class PostIndex:
+    """
+    Persistent index of scraped posts, keyed by canonical URL, stored in a single SQLite file.
+
+    For every post it keeps the hash of the extracted content along with when the post
+    was first seen, last seen and last changed, so a later crawl can tell new and
+    changed posts apart from ones it already has.
+
+    Args:
+        path (str): SQLite database file. Default is 'post_index.sqlite'.
+    """
+
+    def __init__(self, path='post_index.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS posts (
+                url TEXT PRIMARY KEY,
+                source_url TEXT NOT NULL,
+                title TEXT,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                last_changed REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def observe(self, record):
+        """
+        Store a freshly scraped post and report whether it is new, changed or unchanged.
+
+        Returns:
+            str: NEW, CHANGED or UNCHANGED.
+        """
+        url = canonical_url(record['url'])
+        digest = content_hash(record)
+        size = sum(len(value) for value in record.values() if isinstance(value, str))
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute('SELECT content_hash FROM posts WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                status = NEW
+                self._conn.execute('INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                   (url, record['url'], record.get('title'), digest, size, now, now, now))
+            elif row[0] != digest:
+                status = CHANGED
+                self._conn.execute(
+                    'UPDATE posts SET source_url = ?, title = ?, content_hash = ?, size = ?, last_seen = ?, '
+                    'last_changed = ? WHERE url = ?',
+                    (record['url'], record.get('title'), digest, size, now, now, url)
+                )
+            else:
+                status = UNCHANGED
+                self._conn.execute('UPDATE posts SET last_seen = ? WHERE url = ?', (now, url))
+            self._conn.commit()
+        return status
+
+    def get(self, url):
+        """
+        Return the index entry for a post URL as a dict, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, source_url, title, content_hash, size, first_seen, last_seen, last_changed '
+                'FROM posts WHERE url = ?', (canonical_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('url', 'source_url', 'title', 'content_hash', 'size', 'first_seen', 'last_seen', 'last_changed')
+        return dict(zip(keys, row))
+
+    def count(self):
+        """
+        Return the number of posts in the index.
+        """
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
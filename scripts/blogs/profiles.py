@@ -0,0 +1,165 @@
+from urllib.parse import urljoin
+
+import soupsieve as sv
+from bs4 import SoupStrainer
+
+from common.parsing import HasClass, block_text
+
+
+class Field:
+    """
+    Declarative rule for pulling one value out of a page.
+
+    The CSS selector is compiled once with soupsieve when the profile is defined and
+    reused for every page.
+
+    Args:
+        selector (str): CSS selector for the element(s) holding the value.
+        output (str): 'text' for the stripped text, 'paragraphs' for the text with its
+            paragraphs and line breaks kept (see common.parsing.block_text), 'html' for
+            the element's markup, or 'attr' for the attribute named by `attr`. Default is 'text'.
+        attr (str, optional): Attribute to read when output is 'attr'.
+        index (int): Which match to use when the selector matches several elements. Default is 0.
+        text (str, optional): Only consider elements whose stripped text equals this.
+        default: Value used when nothing matches. Default is None.
+        required (bool): Skip the post when nothing matches. Default is False.
+    """
+
+    def __init__(self, selector, output='text', attr=None, index=0, text=None, default=None, required=False):
+        if output not in ('text', 'paragraphs', 'html', 'attr'):
+            raise ValueError(f"Unknown output {output!r}")
+        if output == 'attr' and not attr:
+            raise ValueError("output='attr' needs an attribute name")
+
+        self.selector = selector
+        self.compiled = sv.compile(selector)
+        self.output = output
+        self.attr = attr
+        self.index = index
+        self.text = text
+        self.default = default
+        self.required = required
+
+    def matches(self, soup):
+        """
+        Return every element matching the selector (and text filter, if any), in document order.
+        """
+        elements = self.compiled.select(soup)
+        if self.text is not None:
+            elements = [el for el in elements if el.get_text(strip=True) == self.text]
+        return elements
+
+    def value(self, element):
+        if self.output == 'html':
+            return str(element)
+        if self.output == 'attr':
+            return element.get(self.attr)
+        if self.output == 'paragraphs':
+            return block_text(element)
+        return element.get_text(strip=True)
+
+    def extract(self, soup):
+        """
+        Return the value of the match at `index`, or `default` if there is none.
+        """
+        elements = self.matches(soup)
+        if len(elements) <= self.index:
+            return self.default
+        return self.value(elements[self.index])
+
+    def extract_all(self, soup):
+        """
+        Return the values of all matches, skipping empty ones.
+        """
+        values = (self.value(el) for el in self.matches(soup))
+        return [v for v in values if v]
+
+
+class SiteProfile:
+    """
+    Everything the crawl engine needs to know about one kind of site.
+
+    Args:
+        name (str): Registry name of the profile.
+        links (Field): Rule for the post links on a listing page, read with extract_all.
+        next_page (Field): Rule for the link to the next listing page.
+        fields (dict): Maps record keys to the Field that extracts them from a post page.
+            Records keep this key order, followed by 'url'.
+        parse_only (SoupStrainer, optional): Subtrees of a post page to build when parsing.
+            It must keep every element the field selectors match, and selectors must
+            not depend on ancestors outside those subtrees. Default is None (whole page).
+    """
+
+    def __init__(self, name, links, next_page, fields, parse_only=None):
+        self.name = name
+        self.links = links
+        self.next_page = next_page
+        self.fields = fields
+        self.parse_only = parse_only
+
+    def listing_links(self, soup, page_url):
+        """
+        Return the absolute post URLs listed on a page.
+        """
+        return [urljoin(page_url, href) for href in self.links.extract_all(soup)]
+
+    def next_page_url(self, soup, page_url):
+        """
+        Return the absolute URL of the next listing page, or None on the last page.
+        """
+        href = self.next_page.extract(soup)
+        return urljoin(page_url, href) if href else None
+
+    def extract(self, soup, url):
+        """
+        Build the record for a post page, or return None if a required field is missing.
+        """
+        record = {}
+        for key, field in self.fields.items():
+            value = field.extract(soup)
+            if value is None and field.required:
+                print(f"Missing {key} in post: {url}")
+                return None
+            record[key] = value
+        record['url'] = url
+        return record
+
+
+# Blogger blogs, keeping each post's body as HTML (blog_scraper2)
+BLOGGER_HTML = SiteProfile(
+    name='blogger',
+    links=Field('h3.post-title.entry-title a', output='attr', attr='href'),
+    next_page=Field('a#Blog1_blog-pager-older-link', output='attr', attr='href'),
+    fields={
+        'title': Field('h3.post-title.entry-title', required=True),
+        'content_html': Field('div.post-body.entry-content', output='html', default="<p>No content found</p>"),
+    },
+    parse_only=SoupStrainer(['h3', 'div'], attrs={'class': HasClass('post-title', 'post-body')})
+)
+
+# Blogger blogs, keeping only each post's text, split into paragraphs (blog_scraper1)
+BLOGGER_TEXT = SiteProfile(
+    name='blogger-text',
+    links=BLOGGER_HTML.links,
+    next_page=BLOGGER_HTML.next_page,
+    fields={
+        'title': Field('h3.post-title.entry-title', required=True),
+        'content': Field('div.post-body.entry-content', output='paragraphs', default="No content found"),
+    },
+    parse_only=BLOGGER_HTML.parse_only
+)
+
+# FreeFind search result pages, keeping the first two paragraphs of each hit (advanced_scraper1)
+FREEFIND = SiteProfile(
+    name='freefind',
+    links=Field('li a[href]', output='attr', attr='href'),
+    next_page=Field('a', output='attr', attr='href', text='[Next]'),
+    fields={
+        'title': Field('title', default="No Title"),
+        'first_p_html': Field('p', output='html', index=0, required=True),
+        'second_p_html': Field('p', output='html', index=1, required=True),
+    },
+    parse_only=SoupStrainer(['title', 'p'])
+)
+
+PROFILES = {profile.name: profile for profile in (BLOGGER_HTML, BLOGGER_TEXT, FREEFIND)}
@@ -0,0 +1,139 @@
+import zlib
+from collections.abc import Mapping
+
+# Values shorter than this barely shrink, or even grow, when compressed
+COMPRESS_MIN_BYTES = 256
+
+# Key tuples shared by every record with the same fields, so each record only holds its values
+_KEY_TUPLES = {}
+
+
+class PostRecord(Mapping):
+    """
+    Compact, read-only post record keeping its text values as UTF-8 bytes.
+
+    A dict record holds every extracted HTML fragment as a Python str for as long as the
+    post is kept (in a checkpoint, a list from scrape_all or a batch waiting to be
+    rendered). Here each str value is encoded once when the record is built and,
+    with `compress`, values of COMPRESS_MIN_BYTES or more are zlib-compressed, which
+    shrinks HTML several times over. raw() returns a value's UTF-8 bytes, so exports
+    can write fragments straight into a document (see build_posts_document) without
+    decoding them first.
+
+    Records are mappings, so code written for dict records keeps working: post['title'],
+    post.get(), dict(post) and `in` all decode values on access.
+
+    Args:
+        items (iterable): (key, value) pairs, e.g. dict.items().
+        compress (bool): zlib-compress the larger text values. Default is False.
+    """
+
+    __slots__ = ('_keys', '_values', '_text', '_compressed', '_compress')
+
+    def __init__(self, items, compress=False):
+        keys, values = [], []
+        text = compressed = 0  # Bit i is set when value i was a str / is compressed
+        for i, (key, value) in enumerate(items):
+            if isinstance(value, str):
+                value = value.encode('utf-8')
+                text |= 1 << i
+                if compress and len(value) >= COMPRESS_MIN_BYTES:
+                    packed = zlib.compress(value, 6)
+                    if len(packed) < len(value):
+                        value = packed
+                        compressed |= 1 << i
+            keys.append(key)
+            values.append(value)
+        keys = tuple(keys)
+        self._keys = _KEY_TUPLES.setdefault(keys, keys)
+        self._values = tuple(values)
+        self._text = text
+        self._compressed = compressed
+        self._compress = compress
+
+    @classmethod
+    def from_dict(cls, record, compress=False):
+        """
+        Return a compact copy of a dict record, or the record itself if it is already compact.
+        """
+        if isinstance(record, cls):
+            return record
+        return cls(record.items(), compress=compress)
+
+    @property
+    def compressed(self):
+        """
+        True if at least one value is stored compressed.
+        """
+        return bool(self._compressed)
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the stored text values.
+        """
+        return sum(len(value) for i, value in enumerate(self._values) if self._text >> i & 1)
+
+    def _index(self, key):
+        try:
+            return self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+
+    def raw(self, key):
+        """
+        Return a text value as UTF-8 bytes, decompressing it if needed but never decoding it.
+
+        Raises:
+            KeyError: If the record has no such key.
+            TypeError: If the value is not text (e.g. None).
+        """
+        i = self._index(key)
+        if not self._text >> i & 1:
+            raise TypeError(f"{key!r} is not a text value")
+        value = self._values[i]
+        return zlib.decompress(value) if self._compressed >> i & 1 else value
+
+    def __getitem__(self, key):
+        i = self._index(key)
+        if not self._text >> i & 1:
+            return self._values[i]
+        return self.raw(key).decode('utf-8')
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def replace(self, **values):
+        """
+        Return a new record with some values changed, built with the same `compress` setting.
+
+        The setting is kept even when no value was large enough to be compressed, so
+        a value that grows (e.g. HTML with rewritten image sources) is compressed.
+        """
+        items = [(key, values.pop(key) if key in values else self[key]) for key in self._keys]
+        return PostRecord(items + list(values.items()), compress=self._compress)
+
+    def __getstate__(self):
+        return self._keys, self._values, self._text, self._compressed, self._compress
+
+    def __setstate__(self, state):
+        keys, self._values, self._text, self._compressed, self._compress = state
+        self._keys = _KEY_TUPLES.setdefault(keys, keys)
+
+    def __repr__(self):
+        return f"PostRecord(url={self.get('url')!r}, title={self.get('title')!r}, nbytes={self.nbytes})"
+
+
+def fragment_bytes(post, key):
+    """
+    Return a post's text value as UTF-8 bytes, without a decode/encode round trip for PostRecords.
+    """
+    if isinstance(post, PostRecord):
+        return post.raw(key)
+    return post[key].encode('utf-8')
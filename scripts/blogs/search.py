@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+# Make the shared helpers in scripts/ importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blogs.checkpoint import CrawlState
+from blogs.post_index import canonical_url, content_hash
+from common.parsing import block_text, make_soup
+
+# bm25 weights of the indexed columns: a match in the title counts most
+WEIGHTS = {'title': 10.0, 'url': 2.0, 'body': 1.0}
+
+
+def record_text(record):
+    """
+    Return the searchable text of a post record: every field except its title and URL.
+
+    Fields named '*_html' (e.g. 'content_html') are reduced to their text, with
+    paragraphs kept apart, so markup never matches a query.
+    """
+    parts = []
+    for key, value in record.items():
+        if key in ('title', 'url') or not isinstance(value, str):
+            continue
+        parts.append(block_text(make_soup(value)) if key.endswith('_html') else value)
+    return '\n\n'.join(part for part in parts if part)
+
+
+def quote_query(text):
+    """
+    Turn plain search words into an FTS5 query matching posts that contain all of them.
+
+    Each word is quoted, so punctuation such as "C++" or "don't" cannot be read as
+    query syntax; a trailing '*' is kept for prefix searches.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """
+    Full-text index of scraped posts in a SQLite FTS5 table, updated as posts arrive.
+
+    Titles, URLs and the text of the other fields (see record_text) are indexed with
+    the Porter stemmer, so 'running' also finds 'run'. Each post is stored once under
+    its canonical URL together with the hash of its content; adding a post whose
+    content has not changed is skipped, and a changed post replaces its old entry.
+    Results are ranked with bm25, weighting titles over URLs over body text.
+
+    Adds are committed every `commit_every` posts and on commit()/close(). The
+    database uses WAL mode, so an index opened with `readonly` can be queried while a
+    crawl is adding to it.
+
+    Args:
+        path (str): SQLite database file. Default is 'post_search.sqlite'.
+        commit_every (int): Posts added per transaction. Default is 100.
+        readonly (bool): Open an existing index for searching only. Default is False.
+    """
+
+    def __init__(self, path='post_search.sqlite', commit_every=100, readonly=False):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        if readonly:
+            # Never writes, so it cannot wait on the lock of a crawl adding to the index
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                source_url TEXT NOT NULL,
+                title TEXT,
+                content_hash TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+        """)
+        created = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'documents_fts'").fetchone() is None
+        if created:
+            # The FTS row of a document has the document's id as its rowid
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE documents_fts USING fts5(
+                    title, url, body, tokenize = 'porter unicode61 remove_diacritics 2'
+                )
+            """)
+            # Rank by weighted bm25, so ORDER BY rank lets FTS5 stop after the best matches.
+            # The setting is stored in the index, so it is only written once.
+            weights = ', '.join(str(weight) for weight in WEIGHTS.values())
+            self._conn.execute("INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', ?)",
+                               (f"bm25({weights})",))
+        self._conn.commit()
+
+    def add(self, record):
+        """
+        Index a post record, unless the same content is already indexed under its URL.
+
+        Returns:
+            bool: True if the post was added or updated, False if it was unchanged.
+        """
+        url = canonical_url(record['url'])
+        digest = content_hash(record)
+        with self._lock:
+            row = self._conn.execute('SELECT id, content_hash FROM documents WHERE url = ?', (url,)).fetchone()
+            if row is not None and row[1] == digest:
+                return False
+
+        # Extracting the text is the slow part, so it happens outside the lock
+        title = record.get('title') or ''
+        body = record_text(record)
+        with self._lock:
+            # Looked up again, in case another thread indexed the URL in the meantime
+            row = self._conn.execute('SELECT id FROM documents WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                self._conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (row[0],))
+                self._conn.execute('DELETE FROM documents WHERE id = ?', (row[0],))
+            cursor = self._conn.execute(
+                'INSERT INTO documents (url, source_url, title, content_hash, indexed_at) VALUES (?, ?, ?, ?, ?)',
+                (url, record['url'], title, digest, time.time())
+            )
+            self._conn.execute('INSERT INTO documents_fts (rowid, title, url, body) VALUES (?, ?, ?, ?)',
+                               (cursor.lastrowid, title, record['url'], body))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+        return True
+
+    def remove(self, url):
+        """
+        Drop a post from the index. Returns True if it was there.
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT id FROM documents WHERE url = ?', (canonical_url(url),)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (row[0],))
+            self._conn.execute('DELETE FROM documents WHERE id = ?', (row[0],))
+            self._conn.commit()
+        return True
+
+    def search(self, query, limit=10, offset=0, raw=False):
+        """
+        Return the posts best matching a query, best first.
+
+        Args:
+            query (str): Words that must all occur, e.g. 'tournament results'. A
+                trailing '*' matches a prefix. With `raw`, FTS5 query syntax instead,
+                e.g. '"opening round" OR title:final'.
+            limit (int): Number of results. Default is 10.
+            offset (int): Results to skip, for paging. Default is 0.
+            raw (bool): Pass the query to FTS5 unchanged. Default is False.
+
+        Returns:
+            list: Dicts with 'url', 'title', 'score' (lower is better) and 'snippet',
+                the best matching passage with the matches in [brackets].
+
+        Raises:
+            ValueError: If a raw query is not valid FTS5 syntax.
+        """
+        match = query if raw else quote_query(query)
+        if not match:
+            return []
+        # Snippets are only built for the rows on the requested page
+        sql = ("SELECT d.source_url, d.title, f.rank, f.snippet FROM ("
+               "  SELECT rowid, rank, snippet(documents_fts, 2, '[', ']', '...', 16) AS snippet"
+               "  FROM documents_fts WHERE documents_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?"
+               ") f JOIN documents d ON d.id = f.rowid ORDER BY f.rank")
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, (match, limit, offset)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query {query!r}: {e}") from None
+        return [{'url': url, 'title': title, 'score': round(score, 4), 'snippet': snippet}
+                for url, title, score, snippet in rows]
+
+    def count(self):
+        """
+        Return the number of posts in the index.
+        """
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def optimize(self):
+        """
+        Merge the index's segments into one, which speeds up queries after many updates.
+        """
+        with self._lock:
+            self._conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn.in_transaction:
+                self._conn.commit()
+            self._conn.close()
+
+
+def iter_saved_posts(path):
+    """
+    Yield the post records saved in a JSON Lines export or a crawl state file.
+    """
+    if path.endswith('.json'):
+        yield from CrawlState.load(path).records
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search scraped posts, or add saved posts to the search index.")
+    parser.add_argument('--index', default='post_search.sqlite', help="Search index database")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = commands.add_parser('query', help="Show the posts best matching a query")
+    query_parser.add_argument('words', nargs='+', help="Words to search for; a trailing * matches a prefix")
+    query_parser.add_argument('-n', '--limit', type=int, default=10, help="Number of results")
+    query_parser.add_argument('--raw', action='store_true', help="Treat the query as FTS5 syntax (OR, NEAR, \"phrases\")")
+    query_parser.add_argument('--json', action='store_true', help="Print the results as JSON lines")
+
+    index_parser = commands.add_parser('index', help="Index posts saved by a scraper")
+    index_parser.add_argument('files', nargs='+', help="JSON Lines exports or crawl state files (*_state.json)")
+    index_parser.add_argument('--optimize', action='store_true', help="Merge the index segments afterwards")
+    args = parser.parse_args()
+
+    if args.command == 'query' and not os.path.exists(args.index):
+        parser.error(f"No search index at {args.index}")
+    index = SearchIndex(args.index, readonly=args.command == 'query')
+    try:
+        if args.command == 'index':
+            for path in args.files:
+                added = seen = 0
+                for record in iter_saved_posts(path):
+                    seen += 1
+                    added += index.add(record)
+                index.commit()
+                print(f"Indexed {path}: {added} of {seen} posts new or changed")
+            if args.optimize:
+                index.optimize()
+            print(f"{index.count()} posts in {args.index}")
+            return
+
+        start = time.perf_counter()
+        try:
+            results = index.search(' '.join(args.words), limit=args.limit, raw=args.raw)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = (time.perf_counter() - start) * 1000
+        for rank, result in enumerate(results, 1):
+            if args.json:
+                print(json.dumps(result, ensure_ascii=False))
+                continue
+            snippet = re.sub(r'\s+', ' ', result['snippet'])
+            print(f"{rank}. {result['title']} ({result['score']})")
+            print(f"   {result['url']}")
+            print(f"   {snippet}")
+        if not args.json:
+            print(f"{len(results)} result(s) in {elapsed:.1f} ms from {index.count()} posts")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
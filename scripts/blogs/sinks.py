@@ -0,0 +1,275 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from blogs.pdf_export import save_to_pdf_streaming
+from common.metrics import get_metrics
+
+_DONE = object()  # Tells the PDF batcher's thread that no more posts are coming
+
+
+class Sink:
+    """
+    Consumer of post records, fed one post at a time while the crawl is still running.
+
+    Subclasses implement write() and close(); sinks are context managers that close on exit.
+    """
+
+    def write(self, post):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def drain(posts, *sinks):
+    """
+    Feed every post to each sink as it arrives and return how many posts there were.
+
+    `posts` is consumed lazily, so with a crawl generator each post is written while
+    the next ones are still downloading. If a sink fails, the generator is closed,
+    which stops the crawl and saves its checkpoint.
+    """
+    count = 0
+    try:
+        for post in posts:
+            for sink in sinks:
+                sink.write(post)
+            count += 1
+    finally:
+        if hasattr(posts, 'close'):
+            posts.close()
+    return count
+
+
+class JsonLinesSink(Sink):
+    """
+    Write each post as one JSON object per line, flushed as it is written.
+
+    Args:
+        path (str): Output file.
+        append (bool): Add to an existing file instead of replacing it. Default is False.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        # Line buffered, so other processes can follow the file while the crawl runs
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8', buffering=1)
+
+    def write(self, post):
+        self._file.write(json.dumps(dict(post), ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class SQLiteSink(Sink):
+    """
+    Upsert each post into a SQLite table keyed by URL, committing every `commit_every` posts.
+
+    The title gets its own column; the whole record is stored as JSON.
+
+    Args:
+        path (str): SQLite database file.
+        table (str): Table name. Default is 'posts'.
+        commit_every (int): Posts written per transaction. Default is 100.
+    """
+
+    def __init__(self, path, table='posts', commit_every=100):
+        self.path = path
+        self.table = table
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{table}" (
+                url TEXT PRIMARY KEY,
+                title TEXT,
+                record TEXT NOT NULL,
+                scraped_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def write(self, post):
+        self._conn.execute(
+            f'INSERT INTO "{self.table}" VALUES (?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET '
+            'title = excluded.title, record = excluded.record, scraped_at = excluded.scraped_at',
+            (post['url'], post.get('title'), json.dumps(dict(post), ensure_ascii=False), time.time())
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+class SearchSink(Sink):
+    """
+    Add each post to a full-text SearchIndex as it arrives; unchanged posts are skipped.
+
+    Args:
+        path (str): Search index database. Default is 'post_search.sqlite'.
+    """
+
+    def __init__(self, path='post_search.sqlite'):
+        from blogs.search import SearchIndex
+
+        self.index = SearchIndex(path)
+        self.added = 0
+
+    def write(self, post):
+        self.added += self.index.add(post)
+
+    def close(self):
+        self.index.close()
+
+
+class BackgroundExportSink(Sink):
+    """
+    Sink feeding posts to an export function that runs on a background thread.
+
+    The export pulls posts from a bounded queue as a generator, so it can work on
+    posts while they are still being written, and a slow export makes write() wait
+    instead of letting posts pile up in memory. close() waits for the export to
+    finish and re-raises any error it hit.
+
+    Args:
+        export (callable): Called with the posts generator; its return value is kept as `count`.
+        queue_size (int): Posts that may wait for the export. Default is 50.
+    """
+
+    def __init__(self, export, queue_size=50):
+        self.count = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, args=(export,), daemon=True)
+        self._thread.start()
+
+    def _posts(self):
+        while True:
+            post = self._queue.get()
+            if post is _DONE:
+                return
+            yield post
+
+    def _run(self, export):
+        try:
+            self.count = export(self._posts())
+        except Exception as e:
+            self._error = e
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    break
+        # The export stopped taking posts, so it must have failed
+        raise self._error or RuntimeError("Export stopped")
+
+    def write(self, post):
+        if self._error:
+            raise self._error
+        self._put(post)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._put(_DONE)
+            self._thread.join()
+        if self._error:
+            raise self._error
+
+
+class PdfBatchSink(BackgroundExportSink):
+    """
+    Render posts to a PDF with WeasyPrint in batches while they are still being written.
+
+    save_to_pdf_streaming runs on a background thread (see BackgroundExportSink), so
+    each batch is rendered as soon as it is full. close() waits for the last batch and
+    the merge, and re-raises any rendering error.
+
+    Args:
+        filename (str): Output PDF filename.
+        fields, batch_size, workers, cache_dir: See save_to_pdf_streaming.
+    """
+
+    def __init__(self, filename, fields=('content_html',), batch_size=25, workers=1, cache_dir=None):
+        self.filename = filename
+        super().__init__(
+            lambda posts: save_to_pdf_streaming(posts, filename, fields=fields, batch_size=batch_size,
+                                                workers=workers, cache_dir=cache_dir),
+            queue_size=2 * batch_size
+        )
+
+
+class TextPdfSink(BackgroundExportSink):
+    """
+    Lay out plain-text posts with reportlab in shards while they are still being written.
+
+    save_text_pdf runs on a background thread (see BackgroundExportSink), so each
+    shard is built as soon as it is full; close() waits for the merge.
+
+    Args:
+        filename (str): Output PDF filename.
+        text_field, shard_size, workers, merge, contents: See blogs.text_export.save_text_pdf.
+    """
+
+    def __init__(self, filename, text_field='content', shard_size=200, workers=1, merge=True, contents=True):
+        from blogs.text_export import save_text_pdf
+
+        self.filename = filename
+        super().__init__(
+            lambda posts: save_text_pdf(posts, filename, text_field=text_field, shard_size=shard_size,
+                                        workers=workers, merge=merge, contents=contents),
+            queue_size=2 * shard_size
+        )
+
+
+class ReportlabStorySink(Sink):
+    """
+    Build a reportlab SimpleDocTemplate story from plain-text posts and save it on close.
+
+    Each post is turned into flowables as it arrives (title, URL, one Paragraph per
+    paragraph and a spacer; see blogs.text_export.post_flowables), so the records
+    themselves can be released during the crawl. The whole story is laid out in one
+    pass on close; TextPdfSink scales better for large blogs.
+
+    Args:
+        filename (str): Output PDF filename.
+        text_field (str): Key of the post text. Default is 'content'.
+    """
+
+    def __init__(self, filename, text_field='content'):
+        from blogs.text_export import TextDocTemplate
+
+        self.filename = filename
+        self.text_field = text_field
+        self.count = 0
+        self._doc = TextDocTemplate(filename)
+        self._story = []
+
+    def write(self, post):
+        from blogs.text_export import post_flowables
+
+        self._story.extend(post_flowables(post['title'], post['url'], post[self.text_field]))
+        self.count += 1
+
+    def close(self):
+        if self._story:
+            with get_metrics().stage('render', posts=self.count):
+                self._doc.build(self._story)
+        self._story = []
@@ -0,0 +1,244 @@
+import functools
+import os
+import re
+import tempfile
+import time
+from contextlib import closing
+from xml.sax.saxutils import escape
+
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from blogs.pdf_export import iter_batches
+from common.concurrency import ordered_map, process_pool
+from common.metrics import get_metrics
+
+
+@functools.lru_cache(maxsize=None)
+def text_styles():
+    """
+    Return the paragraph styles of the text export, built once per process.
+    """
+    sample = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('PostTitle', parent=sample['Heading1'], spaceAfter=4),
+        'url': ParagraphStyle('PostUrl', parent=sample['Italic'], fontSize=8, leading=10, spaceAfter=10),
+        'body': ParagraphStyle('PostBody', parent=sample['Normal'], leading=14, spaceAfter=8),
+        'contents': sample['Title'],
+        'toc_entry': ParagraphStyle('TocEntry', parent=sample['Normal'], fontSize=9, leading=11),
+        'toc_page': ParagraphStyle('TocPage', parent=sample['Normal'], fontSize=9, leading=11, alignment=TA_RIGHT),
+    }
+
+
+def split_paragraphs(text):
+    """
+    Split post text at blank lines, as written by the 'paragraphs' field output.
+    """
+    return [paragraph.strip() for paragraph in re.split(r'\n\s*\n', text or '') if paragraph.strip()]
+
+
+def post_flowables(title, url, text):
+    """
+    Return the flowables for one post: its title, URL and one Paragraph per paragraph.
+
+    Everything is escaped, as reportlab reads Paragraph text as markup; line breaks
+    within a paragraph are kept.
+    """
+    styles = text_styles()
+    flowables = [Paragraph(escape(title or ''), styles['title']),
+                 Paragraph(f"URL: {escape(url or '')}", styles['url'])]
+    for paragraph in split_paragraphs(text):
+        flowables.append(Paragraph(escape(paragraph).replace('\n', '<br/>'), styles['body']))
+    flowables.append(Spacer(1, 12))
+    return flowables
+
+
+class TextDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate that bookmarks every post title and records the page it lands on.
+
+    After build(), `titles` holds a (title, page) pair for each post, with pages
+    counted from 1.
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.titles = []
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Paragraph) and flowable.style.name == 'PostTitle':
+            title = flowable.getPlainText()
+            key = f"post{len(self.titles)}"
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(title, key, level=0)
+            self.titles.append((title, self.canv.getPageNumber()))
+
+
+def render_text_shard(job):
+    """
+    Render one shard of posts to a PDF file. May run in a worker process.
+
+    Args:
+        job (tuple): (posts, output_path, pagesize), where posts are (title, url, text) tuples.
+
+    Returns:
+        tuple: (seconds spent rendering, [(title, page)] for each post, number of pages).
+    """
+    posts, output_path, pagesize = job
+    start_time = time.time()
+    doc = TextDocTemplate(output_path, pagesize=pagesize)
+    story = []
+    for title, url, text in posts:
+        story.extend(post_flowables(title, url, text))
+    doc.build(story)
+    return time.time() - start_time, doc.titles, doc.page
+
+
+def build_contents(titles, output_path, pagesize=letter):
+    """
+    Write a table of contents listing each post with its page in the merged document.
+
+    Page numbers count the contents pages themselves, so they match a PDF viewer's.
+    As the number of contents pages is only known once they are laid out, the
+    contents are rebuilt until the guess holds, which takes one or two passes.
+
+    Args:
+        titles (list): (title, page) pairs, with pages counted from the first post page.
+        output_path (str): Destination PDF.
+
+    Returns:
+        int: Number of pages of the table of contents.
+    """
+    styles = text_styles()
+    contents_pages = 1
+    while True:
+        doc = SimpleDocTemplate(output_path, pagesize=pagesize)
+        width = doc.width
+        story = [Paragraph("Contents", styles['contents'])]
+        for title, page in titles:
+            row = Table([[Paragraph(escape(title), styles['toc_entry']),
+                          Paragraph(str(page + contents_pages), styles['toc_page'])]],
+                        colWidths=[width - 48, 48])
+            row.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                                     ('LEFTPADDING', (0, 0), (-1, -1), 0),
+                                     ('RIGHTPADDING', (0, 0), (-1, -1), 0)]))
+            story.append(row)
+        doc.build(story)
+        if doc.page == contents_pages:
+            return contents_pages
+        contents_pages = doc.page
+
+
+def merge_with_outline(part_paths, titles, filename):
+    """
+    Concatenate PDF files into `filename` with one outline entry per post.
+
+    Args:
+        part_paths (list): Files to join, in order.
+        titles (list): (title, page index in the merged file) pairs.
+        filename (str): Destination PDF.
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part_path in part_paths:
+        writer.append(part_path, import_outline=False)
+    for title, page_index in titles:
+        writer.add_outline_item(title, page_index)
+    with open(filename, 'wb') as f:
+        writer.write(f)
+    writer.close()
+
+
+def save_text_pdf(posts, filename, text_field='content', shard_size=200, workers=1, merge=True, contents=True,
+                  pagesize=letter):
+    """
+    Save plain-text posts to a PDF with reportlab, building shards of posts in parallel.
+
+    Each post's text is split into paragraphs (see split_paragraphs) and laid out with
+    one shared set of styles. Posts are grouped into shards of `shard_size`, and each
+    shard is built as its own document, so a layout never holds more than one shard
+    and `workers` processes can build shards at once. `posts` can be a generator and
+    is consumed lazily; only titles, URLs and texts are sent to the workers.
+
+    With `merge`, the shards are joined into `filename`, preceded by a table of
+    contents when `contents` is set, with a bookmark for every post. Otherwise each
+    shard is kept as '<name>-0001.pdf', '<name>-0002.pdf', ... next to `filename`,
+    each with bookmarks for its own posts.
+
+    Args:
+        posts (iterable): Post records with 'title', 'url' and `text_field` keys.
+        filename (str): Output PDF filename.
+        text_field (str): Key of the post text. Default is 'content'.
+        shard_size (int): Posts per shard. Default is 200.
+        workers (int): Number of processes building shards. Default is 1 (build on a background thread).
+        merge (bool): Join the shards into one file. Default is True.
+        contents (bool): Start the merged file with a table of contents. Default is True.
+        pagesize (tuple): Page size. Default is letter.
+
+    Returns:
+        int: Number of posts written.
+    """
+    output_dir = os.path.dirname(os.path.abspath(filename))
+    stem = os.path.splitext(filename)[0]
+    metrics = get_metrics()
+    start_time = time.time()
+    total_posts = 0
+    page_count = 0
+    titles = []  # (title, page index in the merged document, before the contents)
+
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix='.text_parts_') as parts_dir:
+        part_paths = []
+        shard_sizes = []
+
+        def jobs():
+            for index, shard in enumerate(iter_batches(posts, shard_size)):
+                entries = [(post['title'], post['url'], post[text_field]) for post in shard]
+                if merge:
+                    part_path = os.path.join(parts_dir, f"part_{index:05d}.pdf")
+                else:
+                    part_path = f"{stem}-{index + 1:04d}.pdf"
+                part_paths.append(part_path)
+                shard_sizes.append(len(entries))
+                yield entries, part_path, pagesize
+
+        # A single worker builds on a background thread, overlapping with the crawl
+        executor = process_pool(workers) if workers > 1 else None
+        try:
+            results = ordered_map(render_text_shard, jobs(), max_workers=workers, executor=executor)
+            with closing(results):
+                for index, (render_time, shard_titles, shard_pages) in enumerate(results):
+                    titles.extend((title, page_count + page - 1) for title, page in shard_titles)
+                    page_count += shard_pages
+                    total_posts += shard_sizes[index]
+                    metrics.observe('render', render_time, shard=index, posts=shard_sizes[index])
+                    print(f"Rendered shard {index + 1} ({shard_sizes[index]} posts, {total_posts} total). "
+                          f"Time taken: {render_time:.2f} seconds.")
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+        if not part_paths:
+            print("No posts to save.")
+            return 0
+
+        if merge:
+            merge_start = time.time()
+            with metrics.stage('merge', shards=len(part_paths)):
+                if contents:
+                    contents_path = os.path.join(parts_dir, 'contents.pdf')
+                    # The contents list pages counted from 1, as a PDF viewer shows them
+                    contents_pages = build_contents([(title, page + 1) for title, page in titles],
+                                                    contents_path, pagesize=pagesize)
+                    part_paths.insert(0, contents_path)
+                    titles = [(title, page + contents_pages) for title, page in titles]
+                merge_with_outline(part_paths, titles, filename)
+            print(f"Merged {len(shard_sizes)} shards into {filename}. "
+                  f"Time taken: {time.time() - merge_start:.2f} seconds.")
+        else:
+            print(f"Saved {len(part_paths)} shards as {stem}-*.pdf")
+
+    print(f"Text PDF generation complete. Total time taken: {time.time() - start_time:.2f} seconds.")
+    return total_posts
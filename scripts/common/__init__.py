@@ -0,0 +1,3 @@
+"""
+Shared helpers used by the blog and FPL scraping scripts.
+"""
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_TTL = 24 * 60 * 60  # Serve entries without revalidating for a day
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CacheMiss(requests.RequestException):
+    """
+    Raised in cache-only mode when a URL has never been fetched.
+    """
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache keyed by URL, stored in a single SQLite file.
+
+    Entries younger than `ttl` are served without touching the network. Older entries
+    are revalidated with If-None-Match / If-Modified-Since, so an unchanged page costs a
+    304 instead of a full download. Stale entries with no validators are dropped on
+    eviction, and the least recently used entries are dropped once the stored bodies
+    exceed `max_bytes`.
+
+    Args:
+        path (str): SQLite database file. Default is 'http_cache.sqlite'.
+        ttl (float): Seconds an entry is considered fresh. Default is one day.
+        max_bytes (int): Upper bound on the total size of stored bodies. Default is 512 MB.
+    """
+
+    def __init__(self, path='http_cache.sqlite', ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url):
+        """
+        Return the cached entry for a URL as a dict, or None, marking it as recently used.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, status, headers, body, etag, last_modified, fetched_at FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+
+        keys = ('url', 'status', 'headers', 'body', 'etag', 'last_modified', 'fetched_at')
+        entry = dict(zip(keys, row))
+        entry['headers'] = json.loads(entry['headers'])
+        return entry
+
+    def put(self, url, response):
+        """
+        Store a successful response, then evict entries if the cache is over its size limit.
+        """
+        if response.status_code != 200:
+            return
+
+        body = response.content
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, response.status_code, json.dumps(dict(response.headers)), body,
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'), now, now, len(body))
+            )
+            self._conn.commit()
+            self._total_bytes += len(body) - (old[0] if old else 0)
+
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def touch(self, url):
+        """
+        Mark an entry as freshly validated, e.g. after a 304 Not Modified.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+            self._conn.commit()
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    @staticmethod
+    def validators(entry):
+        """
+        Return the conditional request headers for revalidating an entry.
+        """
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def to_response(entry):
+        """
+        Rebuild a requests.Response from a cached entry. The response has from_cache set to True.
+        """
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry['url']
+        response._content = entry['body']
+        response.from_cache = True
+        return response
+
+    def evict(self):
+        """
+        Drop stale entries that cannot be revalidated, then least recently used entries
+        until the total size is within max_bytes.
+        """
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM responses WHERE fetched_at < ? AND etag IS NULL AND last_modified IS NULL',
+                (time.time() - self.ttl,)
+            )
+            self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+            excess = self._total_bytes - self.max_bytes
+            if excess > 0:
+                doomed = []
+                for url, size in self._conn.execute('SELECT url, size FROM responses ORDER BY accessed_at'):
+                    doomed.append((url,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self._conn.executemany('DELETE FROM responses WHERE url = ?', doomed)
+                self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,84 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+
+def ordered_map(func, items, max_workers=8, max_pending=None, executor=None):
+    """
+    Apply a function to items on a bounded thread pool, yielding results in input order.
+
+    Items are pulled lazily, so `items` can be a generator that does its own network
+    work (e.g. walking listing pages). That work runs while earlier calls are still in
+    flight on the pool, so pagination overlaps with the downloads it feeds. If `items`
+    raises, the results of the calls already submitted are still yielded before the
+    error is re-raised. Closing the generator early (e.g. once max_posts is reached)
+    cancels every call not yet started.
+
+    Args:
+        func (callable): Function called with a single item.
+        items (iterable): Items to process, consumed lazily.
+        max_workers (int): Number of worker threads. Default is 8.
+        max_pending (int, optional): Maximum number of submitted calls whose results
+            have not been yielded yet. Default is twice max_workers.
+        executor (concurrent.futures.Executor, optional): Pool to submit to instead of a
+            private thread pool, e.g. a ProcessPoolExecutor for CPU-bound work. It is
+            left running for the caller to shut down.
+
+    Yields:
+        The result of func(item) for each item, in the order the items were produced.
+    """
+    max_pending = max_pending or 2 * max_workers
+    items = iter(items)
+    pending = deque()
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    error = None  # Raised by `items`; re-raised once the calls already submitted are done
+
+    def submit(count):
+        nonlocal error
+        if error is not None:
+            return
+        try:
+            for item in islice(items, count):
+                pending.append(executor.submit(func, item))
+        except Exception as e:
+            error = e
+
+    try:
+        # Fill the window before waiting on anything
+        submit(max_pending)
+
+        while pending:
+            future = pending.popleft()
+
+            # Top up the window first so the workers stay busy while we wait
+            submit(1)
+
+            yield future.result()
+
+        if error is not None:
+            raise error
+    finally:
+        for future in pending:
+            future.cancel()
+        if owns_executor:
+            executor.shutdown(wait=True)
+
+
+def process_pool(max_workers):
+    """
+    Return a ProcessPoolExecutor whose workers are started by a fork server, or spawned.
+
+    A pool forks its workers lazily, on the first submit, which usually happens on a
+    background thread while fetch threads hold requests, urllib3 or SQLite locks. A
+    forked worker gets a copy of those locks in their held state and can deadlock on
+    them. Workers started by a fork server (or spawned, where there is none) begin
+    from a fresh interpreter instead. They import what they run, so scripts using
+    the pool must keep their `if __name__ == '__main__'` guard.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
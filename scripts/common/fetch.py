@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.cache import CacheMiss
+from common.metrics import get_metrics
+
+DEFAULT_TIMEOUT = 10  # Seconds, or a (connect, read) tuple
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class Fetcher:
+    """
+    Pooled HTTP client shared by the scrapers.
+
+    A single requests.Session keeps connections alive, with one connection pool per
+    host. Connection errors, timeouts and 429/5xx responses are retried with
+    exponential backoff and full jitter, and a Retry-After header takes precedence
+    over the computed delay.
+
+    Args:
+        pool_connections (int): Number of per-host connection pools to keep. Default is 10.
+        pool_maxsize (int): Maximum connections kept open per host. Should be at least the
+            number of threads fetching from the same host. Default is 10.
+        timeout (float or tuple): Default request timeout in seconds. Default is 10.
+        retries (int): Number of retries after the first attempt. Default is 3.
+        backoff_factor (float): Base delay in seconds; attempt n waits up to
+            backoff_factor * 2 ** n. Default is 0.5.
+        backoff_max (float): Upper bound for any single delay, including Retry-After. Default is 60.
+        headers (dict, optional): Headers sent with every request.
+        cache (ResponseCache, optional): Persistent cache consulted before the network.
+        cache_only (bool): Serve everything from `cache` and never touch the network,
+            raising CacheMiss for URLs that were never fetched. Default is False.
+        scheduler (HostScheduler, optional): Per-host rate limiter every network attempt
+            waits on. Cache hits are never throttled.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=DEFAULT_TIMEOUT,
+                 retries=3, backoff_factor=0.5, backoff_max=60, headers=None,
+                 cache=None, cache_only=False, scheduler=None):
+        if cache_only and cache is None:
+            raise ValueError("cache_only requires a cache")
+
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self.cache_only = cache_only
+        self.scheduler = scheduler
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        # Retries are handled in _send() so every attempt goes through the same code path
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, timeout=None, **kwargs):
+        """
+        GET a URL, answering from the cache when possible and retrying transient failures.
+
+        Cache entries are keyed by `url` alone, so requests that differ only in
+        `params` or `headers` should not be sent through a cached Fetcher.
+
+        Args:
+            url (str): URL to fetch.
+            timeout (float or tuple, optional): Overrides the default timeout.
+            **kwargs: Passed through to requests.Session.get.
+
+        Returns:
+            requests.Response: The successful response.
+
+        Raises:
+            requests.RequestException: If the request still fails after all retries,
+                or the server answers with a non-retryable error status.
+            CacheMiss: In cache-only mode, if the URL is not cached.
+        """
+        if self.cache is None:
+            return self._send(url, timeout, **kwargs)
+
+        entry = self.cache.get(url)
+        if entry is not None and (self.cache_only or self.cache.is_fresh(entry)):
+            get_metrics().count('cache_hits')
+            return self.cache.to_response(entry)
+        if self.cache_only:
+            raise CacheMiss(f"{url} is not in the cache")
+
+        # Revalidate what we have instead of downloading it again
+        if entry is not None:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self.cache.validators(entry)}
+
+        response = self._send(url, timeout, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            get_metrics().count('cache_revalidated')
+            self.cache.touch(url)
+            return self.cache.to_response(entry)
+
+        self.cache.put(url, response)
+        return response
+
+    def _send(self, url, timeout=None, **kwargs):
+        """
+        Send a GET request over the session with retries and backoff.
+
+        Each attempt is reported to the metrics recorder as a 'throttle' wait, a
+        'connect' time (until the response headers arrived: DNS, connect, TLS and
+        server time) and a 'download' time for the body.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        metrics = get_metrics()
+
+        for attempt in range(self.retries + 1):
+            if self.scheduler is not None:
+                with metrics.stage('throttle'):
+                    self.scheduler.acquire(url, self.session)
+
+            start_time = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if self.scheduler is not None:
+                    self.scheduler.record(url, None, time.monotonic() - start_time)
+                metrics.count('fetch_errors')
+                metrics.event('fetch_error', url=url, attempt=attempt, error=str(e))
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+            else:
+                elapsed = time.monotonic() - start_time
+                if self.scheduler is not None:
+                    self.scheduler.record(url, response.status_code, elapsed)
+                if metrics.enabled:
+                    headers_time = response.elapsed.total_seconds()
+                    metrics.observe('connect', headers_time, url=url, status=response.status_code, attempt=attempt)
+                    metrics.observe('download', max(0.0, elapsed - headers_time), bytes=len(response.content),
+                                    url=url)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+                delay = parse_retry_after(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                response.close()
+
+            metrics.count('retries')
+            time.sleep(min(delay, self.backoff_max))
+
+    def backoff_delay(self, attempt):
+        """
+        Return a jittered exponential delay in seconds for the given retry attempt.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt))
+
+    def close(self):
+        self.session.close()
+
+
+def parse_retry_after(value):
+    """
+    Convert a Retry-After header (seconds or an HTTP date) to seconds, or None if absent or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher():
+    """
+    Return the process-wide Fetcher, creating it with default settings on first use.
+    """
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
+
+
+def configure(**settings):
+    """
+    Replace the process-wide Fetcher with one built from the given Fetcher arguments.
+    """
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is not None:
+            _default_fetcher.close()
+        _default_fetcher = Fetcher(**settings)
+        return _default_fetcher
+
+
+def fetch(url, **kwargs):
+    """
+    GET a URL through the shared Fetcher. See Fetcher.get.
+    """
+    return get_fetcher().get(url, **kwargs)
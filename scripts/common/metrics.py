@@ -0,0 +1,222 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+class NullMetrics:
+    """
+    Stand-in used while metrics are disabled: every call returns at once and records nothing.
+    """
+
+    enabled = False
+    _null_stage = contextlib.nullcontext()
+
+    def stage(self, name, **fields):
+        return self._null_stage
+
+    def observe(self, name, seconds, bytes=0, **fields):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def event(self, name, **fields):
+        pass
+
+    def snapshot(self):
+        return {'stages': {}, 'counters': {}}
+
+    def summary(self):
+        return "Metrics disabled"
+
+    def close(self):
+        pass
+
+
+class Metrics:
+    """
+    Per-stage timers and counters for a scraper run, with structured logs and a Prometheus snapshot.
+
+    Every observation of a stage (e.g. 'connect', 'download', 'parse', 'extract',
+    'render') adds to that stage's count, total seconds, slowest time and bytes. With
+    a `log_path`, each observation and event is also written as one JSON object per
+    line, so a slow run can be traced request by request. With a `prometheus_path`,
+    close() writes the totals in the Prometheus text format, e.g. for node_exporter's
+    textfile collector.
+
+    Only this process is measured; work done in worker processes is observed by the
+    parent as a whole (e.g. each rendered batch).
+
+    Args:
+        log_path (str, optional): JSON-lines file to append observations and events to.
+        prometheus_path (str, optional): File close() writes the snapshot to.
+        prefix (str): Prefix for the Prometheus metric names. Default is 'scraper'.
+    """
+
+    enabled = True
+
+    def __init__(self, log_path=None, prometheus_path=None, prefix='scraper'):
+        self.log_path = log_path
+        self.prometheus_path = prometheus_path
+        self.prefix = prefix
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}  # name -> [count, seconds, max seconds, bytes]
+        self._counters = {}
+        self._log = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """
+        Time the enclosed block as one observation of a stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **fields)
+
+    def observe(self, name, seconds, bytes=0, **fields):
+        """
+        Record one timed observation of a stage, with the bytes it handled and any log fields.
+        """
+        with self._lock:
+            totals = self._stages.get(name)
+            if totals is None:
+                totals = self._stages[name] = [0, 0.0, 0.0, 0]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            totals[3] += bytes
+        if self._log:
+            self._write({'stage': name, 'seconds': round(seconds, 6), 'bytes': bytes, **fields})
+
+    def count(self, name, value=1):
+        """
+        Add to a counter, e.g. 'cache_hits' or 'retries'.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def event(self, name, **fields):
+        """
+        Write an untimed event, e.g. a skipped post, to the log.
+        """
+        if self._log:
+            self._write({'event': name, **fields})
+
+    def _write(self, record):
+        line = json.dumps({'ts': round(time.time(), 6), **record}, default=str)
+        with self._lock:
+            self._log.write(line + '\n')
+
+    def snapshot(self):
+        """
+        Return the totals so far as a dict of stages and counters.
+        """
+        with self._lock:
+            stages = {
+                name: {'count': count, 'seconds': round(seconds, 6), 'max_seconds': round(slowest, 6), 'bytes': size}
+                for name, (count, seconds, slowest, size) in self._stages.items()
+            }
+            return {'stages': stages, 'counters': dict(self._counters)}
+
+    def summary(self):
+        """
+        Return a one-line-per-stage summary for printing at the end of a run.
+        """
+        snapshot = self.snapshot()
+        lines = [f"Run time: {time.time() - self.started:.2f} seconds"]
+        for name, totals in sorted(snapshot['stages'].items(), key=lambda item: -item[1]['seconds']):
+            average = totals['seconds'] / totals['count'] * 1000
+            line = f"  {name}: {totals['count']} x {average:.1f} ms = {totals['seconds']:.2f} s"
+            if totals['bytes']:
+                line += f", {totals['bytes'] / 1024:.0f} KB"
+            lines.append(line)
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"  {name}: {value}")
+        return '\n'.join(lines)
+
+    def prometheus_text(self):
+        """
+        Return the totals in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_seconds Time spent in each stage.",
+            f"# TYPE {p}_stage_seconds summary",
+        ]
+        for name, totals in sorted(snapshot['stages'].items()):
+            lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {totals["seconds"]}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {totals["count"]}')
+        lines += [f"# HELP {p}_stage_max_seconds Slowest single observation of each stage.",
+                  f"# TYPE {p}_stage_max_seconds gauge"]
+        for name, totals in sorted(snapshot['stages'].items()):
+            lines.append(f'{p}_stage_max_seconds{{stage="{name}"}} {totals["max_seconds"]}')
+        lines += [f"# HELP {p}_stage_bytes_total Bytes handled by each stage.",
+                  f"# TYPE {p}_stage_bytes_total counter"]
+        for name, totals in sorted(snapshot['stages'].items()):
+            lines.append(f'{p}_stage_bytes_total{{stage="{name}"}} {totals["bytes"]}')
+        lines += [f"# HELP {p}_events_total Counted events.", f"# TYPE {p}_events_total counter"]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'{p}_events_total{{name="{name}"}} {value}')
+        lines.append(f"{p}_run_started_seconds {self.started:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=None):
+        """
+        Write the Prometheus snapshot atomically, so a collector never reads half a file.
+        """
+        path = path or self.prometheus_path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """
+        Write the Prometheus snapshot, if configured, and close the log.
+        """
+        if self.prometheus_path:
+            self.write_prometheus()
+        if self._log:
+            with self._lock:
+                self._log.close()
+                self._log = None
+
+
+_default_metrics = NullMetrics()
+_default_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return the process-wide metrics recorder; a NullMetrics until configure_metrics is called.
+    """
+    return _default_metrics
+
+
+def configure_metrics(log_path=None, prometheus_path=None, enabled=True, **settings):
+    """
+    Replace the process-wide metrics recorder, closing the previous one.
+
+    Args:
+        log_path (str, optional): JSON-lines log file. See Metrics.
+        prometheus_path (str, optional): Prometheus snapshot file. See Metrics.
+        enabled (bool): False switches instrumentation back off. Default is True.
+        **settings: Other Metrics arguments.
+
+    Returns:
+        Metrics or NullMetrics: The new recorder.
+    """
+    global _default_metrics
+    with _default_lock:
+        _default_metrics.close()
+        if enabled:
+            _default_metrics = Metrics(log_path=log_path, prometheus_path=prometheus_path, **settings)
+        else:
+            _default_metrics = NullMetrics()
+        return _default_metrics
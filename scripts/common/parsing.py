@@ -0,0 +1,96 @@
+import re
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, PreformattedString
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+# Elements that start a new paragraph in block_text
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section', 'table',
+    'tr', 'ul',
+])
+
+# Elements whose text is never shown
+SKIPPED_TAGS = frozenset(['script', 'style', 'noscript', 'template'])
+
+
+def make_soup(markup, parse_only=None, parser=None):
+    """
+    Parse HTML with the fastest available backend: lxml when installed, html.parser otherwise.
+
+    Args:
+        markup (str or bytes): Document to parse.
+        parse_only (SoupStrainer, optional): Build only the matching subtrees, which is
+            much cheaper when just a few elements of a large page are needed.
+        parser (str, optional): Force a specific BeautifulSoup backend.
+
+    Returns:
+        BeautifulSoup: The parsed (possibly partial) document.
+    """
+    return BeautifulSoup(markup, parser or DEFAULT_PARSER, parse_only=parse_only)
+
+
+class HasClass:
+    """
+    SoupStrainer attribute filter matching elements that carry any of the given CSS classes.
+
+    While parsing with a strainer the class attribute is still the raw string, so a
+    plain list of class names would never match a multi-class element. Unlike a
+    lambda, instances can be pickled along with their profile into worker processes.
+    """
+
+    def __init__(self, *names):
+        self.names = frozenset(names)
+
+    def __call__(self, value):
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return not self.names.isdisjoint(classes)
+
+
+def block_text(element):
+    """
+    Return an element's text with its paragraph structure kept.
+
+    get_text(strip=True) runs every paragraph (and the words on either side of a
+    tag) together. Here block elements such as <p> and <div> become paragraphs
+    separated by a blank line, <br> becomes a line break within a paragraph, and
+    other whitespace is collapsed to single spaces. Two <br> in a row, which
+    Blogger uses between paragraphs, also start a new paragraph.
+
+    Returns:
+        str: Paragraphs separated by blank lines.
+    """
+    parts = []
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, PreformattedString):  # Comments, CDATA, doctypes
+                    parts.append(str(child))
+            elif child.name == 'br':
+                parts.append('\n')
+            elif child.name in SKIPPED_TAGS:
+                continue
+            elif child.name in BLOCK_TAGS:
+                parts.append('\n\n')
+                walk(child)
+                parts.append('\n\n')
+            else:
+                walk(child)
+
+    walk(element)
+    paragraphs = []
+    for chunk in re.split(r'\n[^\S\n]*\n', ''.join(parts)):
+        lines = [' '.join(line.split()) for line in chunk.split('\n')]
+        paragraph = '\n'.join(line for line in lines if line)
+        if paragraph:
+            paragraphs.append(paragraph)
+    return '\n\n'.join(paragraphs)
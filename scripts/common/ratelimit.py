@@ -0,0 +1,163 @@
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+
+class RobotsDisallowed(requests.RequestException):
+    """
+    Raised when robots.txt does not allow fetching a URL.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` requests per second with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return how many seconds the caller must wait before using it.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # A negative balance is a queue of callers; each waits for its own token
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostScheduler:
+    """
+    Per-host politeness scheduler shared by every thread fetching through a Fetcher.
+
+    Each host gets its own token bucket, so crawls of different hosts never wait on
+    each other. A host's rate comes from the Crawl-delay in its robots.txt when there
+    is one, and from `rate` otherwise; a host with a Crawl-delay never gets a burst,
+    so even its first requests are spaced by the delay. A 429 response halves the host's rate (down to
+    `min_rate`); every later success recovers it by `recovery` until the configured
+    rate is reached again.
+
+    Args:
+        rate (float): Default requests per second per host. Default is 2.
+        burst (int): Requests a host may receive back to back. Default is 2.
+        respect_robots (bool): Read robots.txt for Crawl-delay and disallowed paths. Default is True.
+        user_agent (str): Agent name used to look up robots.txt rules. Default is '*'.
+        min_rate (float): Lowest rate 429 backoff can drive a host to. Default is 0.05.
+        recovery (float): Factor the rate grows by after each success. Default is 1.1.
+    """
+
+    def __init__(self, rate=2.0, burst=2, respect_robots=True, user_agent='*', min_rate=0.05, recovery=1.1):
+        self.rate = rate
+        self.burst = burst
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.min_rate = min_rate
+        self.recovery = recovery
+
+        self._lock = threading.Lock()
+        self._hosts = {}  # host -> (bucket, target rate, robots parser)
+        self._stats_lock = threading.Lock()
+        self.throttled_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self.requests = 0
+        self.throttled_requests = 0
+
+    def _host(self, url, session):
+        """
+        Return (bucket, target rate, robots) for the URL's host, reading robots.txt on first use.
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if host in self._hosts:
+                return self._hosts[host]
+
+        robots = None
+        rate = self.rate
+        burst = self.burst
+        if self.respect_robots:
+            robots = self._read_robots(host, session)
+            delay = robots.crawl_delay(self.user_agent) if robots else None
+            if delay:
+                rate = min(rate, 1.0 / float(delay))
+                # A Crawl-delay applies between any two requests, so no bursts either
+                burst = 1
+
+        with self._lock:
+            # Another thread may have read robots.txt for the same host in the meantime
+            return self._hosts.setdefault(host, (TokenBucket(rate, burst), rate, robots))
+
+    @staticmethod
+    def _read_robots(host, session):
+        robots = RobotFileParser(f"{host}/robots.txt")
+        try:
+            response = session.get(robots.url, timeout=10)
+        except requests.RequestException:
+            return None
+        if response.status_code >= 400:
+            return None
+        robots.parse(response.text.splitlines())
+        return robots
+
+    def acquire(self, url, session):
+        """
+        Block until the URL's host may receive another request.
+
+        Raises:
+            RobotsDisallowed: If robots.txt forbids the URL.
+        """
+        bucket, _, robots = self._host(url, session)
+        if robots is not None and not robots.can_fetch(self.user_agent, url):
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+
+        wait = bucket.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        with self._stats_lock:
+            self.requests += 1
+            if wait > 0:
+                self.throttled_requests += 1
+                self.throttled_seconds += wait
+
+    def record(self, url, status_code, elapsed):
+        """
+        Feed back the outcome of a request: slow the host down on 429, speed it back up otherwise.
+        """
+        with self._stats_lock:
+            self.fetch_seconds += elapsed
+
+        parts = urlsplit(url)
+        with self._lock:
+            entry = self._hosts.get(f"{parts.scheme}://{parts.netloc}")
+        if entry is None:
+            return
+
+        bucket, target_rate, _ = entry
+        with bucket.lock:
+            if status_code == 429:
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+            elif bucket.rate < target_rate:
+                bucket.rate = min(target_rate, bucket.rate * self.recovery)
+
+    def stats(self):
+        """
+        Return the throttling counters as a dict.
+        """
+        with self._stats_lock:
+            return {
+                'requests': self.requests,
+                'throttled_requests': self.throttled_requests,
+                'throttled_seconds': round(self.throttled_seconds, 3),
+                'fetch_seconds': round(self.fetch_seconds, 3),
+            }
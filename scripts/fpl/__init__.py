@@ -0,0 +1,3 @@
+"""
+fbref scraping and the FPL stats pipeline.
+"""
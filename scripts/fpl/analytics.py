@@ -0,0 +1,279 @@
+import functools
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Short names for the counting stats of the flattened table, used to name derived columns
+COUNT_STATS = {
+    'gls': 'performance_gls',
+    'ast': 'performance_ast',
+    'npg': 'performance_g-pk',
+    'xg': 'expected_xg',
+    'npxg': 'expected_npxg',
+    'xag': 'expected_xag',
+    'prgc': 'progression_prgc',
+    'prgp': 'progression_prgp',
+    'prgr': 'progression_prgr',
+}
+
+# Goals and assists against their expected values: positive means finishing above expectation
+OVERPERFORMANCE = {
+    'xg_diff': ('performance_gls', 'expected_xg'),
+    'npxg_diff': ('performance_g-pk', 'expected_npxg'),
+    'xag_diff': ('performance_ast', 'expected_xag'),
+}
+
+PER_90 = [f"{name}_p90" for name in COUNT_STATS]
+PERCENTILE_METRICS = PER_90 + list(OVERPERFORMANCE)
+
+# Rows of the squad tables that are not players
+TOTAL_ROWS = ('Squad Total', 'Opponent Total')
+
+DEFAULT_MIN_MINUTES = 450  # Five full matches before per-90 rates mean much
+
+
+def load_frame(source):
+    """
+    Return the flattened stats as a DataFrame from a frame, a processed CSV or a dataset folder.
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    if os.path.isdir(source):
+        from fpl.columnar import read_stats
+        return read_stats(source)
+    return pd.read_csv(source)
+
+
+def source_fingerprint(source):
+    """
+    Return a hash of the path, size and modification time of every file of a CSV or dataset folder.
+
+    A dataset folder's own modification time does not change when the part files in
+    its season=/team= subfolders are rewritten, so each file is looked at.
+    """
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(folder, name) for folder, _, names in os.walk(source) for name in names)
+    else:
+        paths = [source]
+    digest = hashlib.sha256()
+    for path in paths:
+        info = os.stat(path)
+        digest.update(f"{os.path.relpath(path, source)}\0{info.st_size}\0{info.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def derive_metrics(data, min_minutes=DEFAULT_MIN_MINUTES):
+    """
+    Add per-90 rates, xG over/underperformance and position percentiles to a flattened stats frame.
+
+    Everything is computed column-wise. Percentiles rank each player against others
+    of the same primary position (the first one listed, e.g. 'MF' for 'MF,FW') who
+    played at least `min_minutes`; players below the threshold get no percentiles.
+
+    Args:
+        data (pandas.DataFrame): Flattened stats, e.g. processed_stats.csv.
+        min_minutes (int): Minutes needed to be ranked. Default is 450.
+
+    Returns:
+        pandas.DataFrame: One row per player with the original columns, 'position',
+            'minutes', '<stat>_p90', the '*_diff' columns and '<metric>_pct'.
+    """
+    data = data[~data['player'].isin(TOTAL_ROWS) & data['player'].notna()].reset_index(drop=True)
+    table = data.copy()
+
+    table['position'] = data['pos'].astype(str).str.split(',').str[0].astype(str)
+    table['minutes'] = pd.to_numeric(data['playing_time_min'], errors='coerce').fillna(0).to_numpy('float64')
+    nineties = table['minutes'].to_numpy() / 90
+
+    for name, column in COUNT_STATS.items():
+        values = pd.to_numeric(data[column], errors='coerce').to_numpy('float64')
+        per_90 = np.full(len(values), np.nan)
+        np.divide(values, nineties, out=per_90, where=nineties > 0)
+        table[f"{name}_p90"] = per_90
+
+    for name, (actual, expected) in OVERPERFORMANCE.items():
+        table[name] = (pd.to_numeric(data[actual], errors='coerce').to_numpy('float64')
+                       - pd.to_numeric(data[expected], errors='coerce').to_numpy('float64'))
+
+    eligible = table['minutes'] >= min_minutes
+    ranks = table.loc[eligible].groupby('position')[PERCENTILE_METRICS].rank(pct=True)
+    for metric in PERCENTILE_METRICS:
+        table[f"{metric}_pct"] = ranks[metric].reindex(table.index)
+    return table
+
+
+class PlayerAnalytics:
+    """
+    Precomputed player metrics with indexes for fast filtered top-k and similarity queries.
+
+    The derived table is computed once. Boolean masks for each team, position (and
+    season, if present) are built up front, minutes are kept sorted for threshold
+    lookups, and each filter combination is memoised, so a query costs a few array
+    operations regardless of how it is filtered. Similarity uses cosine distance
+    over per-90 rates standardised across players with `min_minutes`.
+
+    Args:
+        data (pandas.DataFrame): Flattened stats, e.g. processed_stats.csv.
+        min_minutes (int): Minutes needed for percentiles and the similarity scale. Default is 450.
+        features (list, optional): Columns compared by similar(). Default is every per-90 rate.
+        derived (bool): `data` already holds derive_metrics output, e.g. from a cache. Default is False.
+    """
+
+    def __init__(self, data, min_minutes=DEFAULT_MIN_MINUTES, features=None, derived=False):
+        self.min_minutes = min_minutes
+        self.table = data if derived else derive_metrics(data, min_minutes=min_minutes)
+        self.features = list(features or PER_90)
+
+        self._columns = {}
+
+        # Row positions ordered by minutes, so a threshold is one binary search
+        minutes = self.column('minutes')
+        self._minutes_order = np.argsort(minutes, kind='stable')
+        self._minutes_sorted = minutes[self._minutes_order]
+
+        self._masks = {}
+        for column in ('team', 'position', 'season'):
+            if column in self.table.columns:
+                keys = self.table[column].astype(str).to_numpy()
+                self._masks[column] = {key: keys == key for key in np.unique(keys)}
+
+        self._vectors = self._feature_vectors()
+        self._players = self.table['player'].astype(str).to_numpy()
+        self._teams = self.table['team'].astype(str).to_numpy() if 'team' in self.table.columns else None
+        self.mask = functools.lru_cache(maxsize=4096)(self._build_mask)
+
+    @classmethod
+    def from_source(cls, source, cache_path=None, min_minutes=DEFAULT_MIN_MINUTES, features=None):
+        """
+        Build the analytics for a CSV, dataset folder or frame, reusing a cached table when possible.
+
+        With a `cache_path`, the derived table is stored there as Parquet, together with
+        a fingerprint of the source (see source_fingerprint), and read back on later
+        calls until a source file changes or `min_minutes` differs.
+        """
+        fingerprint = source_fingerprint(source) if cache_path and isinstance(source, str) else None
+        if fingerprint and os.path.exists(cache_path):
+            table = pd.read_parquet(cache_path)
+            if table.attrs.get('source_fingerprint') == fingerprint \
+                    and table.attrs.get('min_minutes', min_minutes) == min_minutes:
+                return cls(table, min_minutes=min_minutes, features=features, derived=True)
+
+        analytics = cls(load_frame(source), min_minutes=min_minutes, features=features)
+        if cache_path:
+            analytics.table.attrs['min_minutes'] = min_minutes
+            analytics.table.attrs['source_fingerprint'] = fingerprint
+            analytics.table.to_parquet(cache_path, index=False)
+        return analytics
+
+    def column(self, name):
+        """
+        Return a column of the table as a NumPy array, converted once and then reused.
+        """
+        values = self._columns.get(name)
+        if values is None:
+            values = self._columns[name] = self.table[name].to_numpy()
+        return values
+
+    def _feature_vectors(self):
+        """
+        Return unit-length rows of standardised features; players without minutes get zeros.
+        """
+        values = self.table[self.features].to_numpy('float64')
+        eligible = self.column('minutes') >= self.min_minutes
+        reference = values[eligible] if eligible.any() else values
+        mean = np.nanmean(reference, axis=0)
+        std = np.nanstd(reference, axis=0)
+        std[~(std > 0)] = 1.0
+        scaled = np.nan_to_num((values - mean) / std)
+        norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (scaled / norms).astype('float32')
+
+    def _build_mask(self, team=None, position=None, min_minutes=None, season=None):
+        mask = np.ones(len(self.table), dtype=bool)
+        for column, key in (('team', team), ('position', position), ('season', season)):
+            if key is not None:
+                key_mask = self._masks.get(column, {}).get(str(key))
+                if key_mask is None:
+                    return np.zeros(len(self.table), dtype=bool)
+                mask &= key_mask
+        if min_minutes:
+            start = np.searchsorted(self._minutes_sorted, min_minutes, side='left')
+            minutes_mask = np.zeros(len(self.table), dtype=bool)
+            minutes_mask[self._minutes_order[start:]] = True
+            mask &= minutes_mask
+        # Cached masks are shared between queries, so callers must not modify them
+        mask.flags.writeable = False
+        return mask
+
+    def rows(self, team=None, position=None, min_minutes=None, season=None):
+        """
+        Return the players matching the filters.
+        """
+        return self.table[self.mask(team, position, min_minutes, season)]
+
+    def top(self, metric, k=10, team=None, position=None, min_minutes=None, season=None, ascending=False):
+        """
+        Return the k best players for a metric, optionally filtered by team, position and minutes.
+
+        Args:
+            metric (str): Any numeric column of the table, e.g. 'npxg_p90' or 'xg_diff_pct'.
+            k (int): Number of players. Default is 10.
+            ascending (bool): Return the lowest values instead. Default is False.
+
+        Returns:
+            pandas.DataFrame: player, team, position, minutes and the metric, best first.
+        """
+        values = self.column(metric).astype('float64', copy=False)
+        candidates = np.flatnonzero(self.mask(team, position, min_minutes, season) & ~np.isnan(values))
+        scores = values[candidates] if ascending else -values[candidates]
+        if len(candidates) > k:
+            # Partial sort: only the k best are ordered
+            best = np.argpartition(scores, k)[:k]
+            candidates, scores = candidates[best], scores[best]
+        chosen = candidates[np.argsort(scores, kind='stable')]
+        return self._result(chosen, {metric: values[chosen]})
+
+    def similar(self, player, k=10, team=None, position=None, min_minutes=None, season=None, player_team=None):
+        """
+        Return the players whose per-90 profile is closest to `player`'s by cosine similarity.
+
+        Args:
+            player (str): Player name. If several rows match, the one with the most
+                minutes is used, or the one for `player_team`.
+            k (int): Number of players. Default is 10.
+            team, position, min_minutes, season: Filters for the candidates.
+            player_team (str, optional): Team of `player`, to tell namesakes apart.
+
+        Returns:
+            pandas.DataFrame: player, team, position, minutes and 'similarity' (1 is identical), best first.
+
+        Raises:
+            KeyError: If no player has that name.
+        """
+        matches = np.flatnonzero(self._players == player)
+        if player_team is not None and self._teams is not None:
+            matches = matches[self._teams[matches] == player_team]
+        if not len(matches):
+            raise KeyError(f"Unknown player {player!r}")
+        target = matches[np.argmax(self.column('minutes')[matches])]
+
+        similarity = self._vectors @ self._vectors[target]
+        mask = self.mask(team, position, min_minutes, season).copy()
+        mask[target] = False
+        candidates = np.flatnonzero(mask)
+        scores = -similarity[candidates]
+        if len(candidates) > k:
+            best = np.argpartition(scores, k)[:k]
+            candidates, scores = candidates[best], scores[best]
+        chosen = candidates[np.argsort(scores, kind='stable')]
+        return self._result(chosen, {'similarity': similarity[chosen]})
+
+    def _result(self, positions, extra):
+        # Built from the cached arrays, as indexing the DataFrame costs more than the query
+        result = {column: self.column(column)[positions]
+                  for column in ('player', 'team', 'position', 'minutes') if column in self.table.columns}
+        result.update(extra)
+        return pd.DataFrame(result)
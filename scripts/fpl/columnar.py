@@ -0,0 +1,167 @@
+import glob
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Explicit types for the flattened fbref standard stats columns (see flatten.py)
+STATS_FIELDS = {
+    'player': pa.string(),
+    'nation': CATEGORY,
+    'pos': CATEGORY,
+    'age': pa.string(),  # 'years-days', or the squad average on total rows
+    'playing_time_mp': pa.int16(),
+    'playing_time_starts': pa.int16(),
+    'playing_time_min': pa.int32(),
+    'playing_time_90s': pa.float64(),
+    'performance_gls': pa.int16(),
+    'performance_ast': pa.int16(),
+    'performance_g+a': pa.int16(),
+    'performance_g-pk': pa.int16(),
+    'performance_pk': pa.int16(),
+    'performance_pkatt': pa.int16(),
+    'performance_crdy': pa.int16(),
+    'performance_crdr': pa.int16(),
+    'expected_xg': pa.float64(),
+    'expected_npxg': pa.float64(),
+    'expected_xag': pa.float64(),
+    'expected_npxg+xag': pa.float64(),
+    'progression_prgc': pa.int32(),
+    'progression_prgp': pa.int32(),
+    'progression_prgr': pa.int32(),
+    'per_90_minutes_gls': pa.float64(),
+    'per_90_minutes_ast': pa.float64(),
+    'per_90_minutes_g+a': pa.float64(),
+    'per_90_minutes_g-pk': pa.float64(),
+    'per_90_minutes_g+a-pk': pa.float64(),
+    'per_90_minutes_xg': pa.float64(),
+    'per_90_minutes_xag': pa.float64(),
+    'per_90_minutes_xg+xag': pa.float64(),
+    'per_90_minutes_npxg': pa.float64(),
+    'per_90_minutes_npxg+xag': pa.float64(),
+    'team': CATEGORY,
+    'season': CATEGORY,
+}
+
+# Directory layout: <root>/season=<season>/team=<team>/
+PARTITIONING = ds.partitioning(pa.schema([('season', pa.string()), ('team', pa.string())]), flavor='hive')
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+
+
+def stats_schema(columns):
+    """
+    Return the Arrow schema for a flattened stats frame with the given columns.
+
+    Known columns get their explicit type; any other column falls back to float64,
+    since everything fbref adds beyond the named text columns is numeric.
+    """
+    return pa.schema([(name, STATS_FIELDS.get(name, pa.float64())) for name in columns])
+
+
+def to_table(data, season=None):
+    """
+    Convert a flattened stats DataFrame to an Arrow table with the explicit schema.
+
+    Args:
+        data (pandas.DataFrame): Frame with flattened column names, e.g. from flatten.py.
+        season (str, optional): Season label stored in a 'season' column, e.g. '2024-2025'.
+
+    Returns:
+        pyarrow.Table: The typed table.
+    """
+    if season is not None:
+        data = data.assign(season=season)
+    return pa.Table.from_pandas(data, schema=stats_schema(data.columns), preserve_index=False)
+
+
+def extension(file_format):
+    return 'parquet' if file_format == 'parquet' else 'arrow'
+
+
+def write_dataset(data, root, season, file_format='parquet', basename=None):
+    """
+    Write a flattened stats frame as a dataset partitioned by season and team.
+
+    Partitions present in `data` are replaced, other seasons and teams are left alone,
+    so teams can be written one by one as they are scraped.
+
+    Args:
+        data (pandas.DataFrame): Flattened stats with a 'team' column.
+        root (str): Dataset directory.
+        season (str): Season label, e.g. '2024-2025'.
+        file_format (str): 'parquet' or 'arrow' (Arrow IPC, best for memory-mapped reads).
+            Default is 'parquet'.
+        basename (str, optional): Name the files '<basename>-<i>' and add them to the
+            partitions instead of replacing them, so a frame can be written in chunks.
+            Files left by an earlier run are removed with clear_files.
+    """
+    table = to_table(data, season=season)
+    # Partition keys are encoded in the directory names, not stored in the files
+    for name in ('season', 'team'):
+        index = table.schema.get_field_index(name)
+        table = table.set_column(index, name, table.column(name).cast(pa.string()))
+
+    ds.write_dataset(
+        table, root,
+        format=FORMATS[file_format],
+        partitioning=PARTITIONING,
+        existing_data_behavior='overwrite_or_ignore' if basename else 'delete_matching',
+        basename_template=f"{basename or 'part'}-{{i}}.{extension(file_format)}",
+    )
+
+
+def clear_files(root, season, basename, file_format='parquet'):
+    """
+    Remove the chunk files written for one input under `basename` for a season, in every team partition.
+
+    flatten.py writes each chunk of an input with write_dataset(basename='<basename>-<chunk>'),
+    giving files named '<basename>-<chunk>-<i>'. Only names of exactly that shape are
+    removed, so the files of another input whose name starts the same (e.g.
+    'stats-2023' next to 'stats') are kept.
+    """
+    ext = extension(file_format)
+    own_file = re.compile(rf"^{re.escape(basename)}-\d+-\d+\.{ext}$")
+    pattern = os.path.join(root, f"season={season}", '*', f"{glob.escape(basename)}-[0-9]*-*.{ext}")
+    for path in glob.glob(pattern):
+        if own_file.match(os.path.basename(path)):
+            os.remove(path)
+
+
+def open_dataset(root, file_format='parquet', memory_map=True):
+    """
+    Open a stats dataset written by write_dataset without reading any rows yet.
+    """
+    return ds.dataset(
+        root,
+        format=FORMATS[file_format],
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=memory_map),
+    )
+
+
+def read_stats(root, columns=None, filter=None, file_format='parquet', memory_map=True):
+    """
+    Load stats from a dataset, reading only the requested columns and partitions.
+
+    Args:
+        root (str): Dataset directory.
+        columns (list, optional): Columns to load. Default is None (all).
+        filter (pyarrow.dataset.Expression, optional): Row filter; conditions on season
+            and team skip whole directories, e.g. ds.field('season') == '2024-2025'.
+        file_format (str): 'parquet' or 'arrow'. Default is 'parquet'.
+        memory_map (bool): Memory-map the files instead of reading them. Default is True.
+
+    Returns:
+        pandas.DataFrame: The selected rows, with nation, pos, team and season as categoricals.
+    """
+    table = open_dataset(root, file_format, memory_map).to_table(columns=columns, filter=filter)
+    for name in ('season', 'team'):
+        if name in table.column_names:
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, name, table.column(name).dictionary_encode())
+    return table.to_pandas()
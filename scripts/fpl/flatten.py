@@ -1,12 +1,17 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 
-# File paths
-input_file = '/Users/asad/Desktop/dataScraping/scripts/stats.csv'  # Input CSV file path
-output_file = '/Users/asad/Desktop/dataScraping/scripts/processed_stats.csv'  # Output processed CSV file path
+# Make the shared helpers in scripts/ importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Load the CSV file, considering the first two rows as headers
-data = pd.read_csv(input_file, header=[0, 1])
+from common.concurrency import ordered_map
+from fpl.columnar import FORMATS, STATS_FIELDS, clear_files, write_dataset
 
 # Function to get meaningful header
 def get_meaningful_header(header_tuple):
@@ -32,16 +37,145 @@ def get_meaningful_header(header_tuple):
     
     return ''
 
-# Create new flattened headers
-new_headers = [
-    get_meaningful_header(col).strip().replace(" ", "_").lower()
-    for col in data.columns
-]
+def flatten_columns(columns):
+    """
+    Return flattened snake_case names for the two-level columns of a stats table.
+    """
+    return [
+        get_meaningful_header(col).strip().replace(" ", "_").lower()
+        for col in columns
+    ]
+
+
+def header_mapping(path):
+    """
+    Read only the two header rows of a stats CSV and return its flattened column names.
+    """
+    return flatten_columns(pd.read_csv(path, header=[0, 1], nrows=0).columns)
+
+
+def csv_dtypes(names):
+    """
+    Return read_csv dtypes for flattened columns, taken from the columnar schema.
+
+    Integer stats use pandas' nullable integer types, since fbref leaves some of them
+    blank. Rates are read as float64 so values are written back exactly as they were
+    read. Columns the schema does not know are inferred.
+    """
+    dtypes = {}
+    for name in names:
+        field = STATS_FIELDS.get(name)
+        if field is None:
+            continue
+        if pa.types.is_dictionary(field):
+            dtypes[name] = 'category'
+        elif pa.types.is_string(field):
+            dtypes[name] = 'str'
+        elif pa.types.is_integer(field):
+            dtypes[name] = f"Int{field.bit_width}"
+        else:
+            dtypes[name] = 'float64'
+    return dtypes
+
+
+def flatten_csv(input_file, output_file, chunksize=50000, dataset_dir=None, season=None, file_format='parquet'):
+    """
+    Rewrite a stats CSV with flattened headers, streaming its body in chunks.
+
+    The header mapping is computed once from the two header rows; the body is then
+    read `chunksize` rows at a time with explicit dtypes and appended to the output,
+    so memory use does not depend on the size of the file.
+
+    Args:
+        input_file (str): CSV with fbref's two header rows, e.g. stats.csv or squads/<team>.csv.
+        output_file (str): Destination CSV with one header row.
+        chunksize (int): Rows processed at a time. Default is 50000.
+        dataset_dir (str, optional): Also write the rows to this dataset (see fpl.columnar).
+        season (str, optional): Season label for the dataset partitions. Required with dataset_dir.
+        file_format (str): Dataset file format, 'parquet' or 'arrow'. Default is 'parquet'.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if dataset_dir and not season:
+        raise ValueError("dataset_dir needs a season")
+
+    names = header_mapping(input_file)
+    # Files from an earlier run of this input are replaced, those of other inputs kept
+    basename = os.path.splitext(os.path.basename(input_file))[0]
+    if dataset_dir:
+        clear_files(dataset_dir, season, basename, file_format)
+
+    rows = 0
+    reader = pd.read_csv(input_file, skiprows=2, header=None, names=names, dtype=csv_dtypes(names),
+                         chunksize=chunksize)
+    with reader, open(output_file, 'w', encoding='utf-8', newline='') as out:
+        pd.DataFrame(columns=names).to_csv(out, index=False)
+        for i, chunk in enumerate(reader):
+            chunk.to_csv(out, index=False, header=False)
+            if dataset_dir:
+                write_dataset(chunk, dataset_dir, season=season, file_format=file_format,
+                              basename=f"{basename}-{i}")
+            rows += len(chunk)
+    return rows
+
+
+def flatten_job(job):
+    """
+    Run flatten_csv for one (input_file, output_file, options) job. Used by the process pool.
+    """
+    input_file, output_file, options = job
+    return input_file, output_file, flatten_csv(input_file, output_file, **options)
+
+
+def flatten_files(input_files, output_dir=None, workers=4, **options):
+    """
+    Flatten several stats CSVs (e.g. one per team or season) in parallel processes.
+
+    Each input is written to 'processed_<name>' in `output_dir`, or next to the input
+    when no folder is given. Other keyword arguments are passed to flatten_csv.
+
+    Yields:
+        tuple: (input_file, output_file, rows) for each input, in order.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        (path, os.path.join(output_dir or os.path.dirname(path), f"processed_{os.path.basename(path)}"), options)
+        for path in input_files
+    ]
+
+    if workers <= 1 or len(jobs) == 1:
+        for job in jobs:
+            yield flatten_job(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from ordered_map(flatten_job, jobs, max_workers=workers, executor=pool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flatten the two header rows of fbref stats CSV files.")
+    parser.add_argument('inputs', nargs='+', help="Stats CSV files, e.g. stats.csv or squads/*.csv")
+    parser.add_argument('-o', '--output-dir', help="Folder for the processed files (default: next to each input)")
+    parser.add_argument('--dataset', help="Also write the rows to this Parquet/Arrow dataset folder")
+    parser.add_argument('--season', help="Season label for the dataset partitions, e.g. 2024-2025")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='parquet', help="Dataset file format")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows processed at a time")
+    parser.add_argument('--workers', type=int, default=4, help="Files processed in parallel")
+    args = parser.parse_args()
+
+    if args.dataset and not args.season:
+        parser.error("--dataset needs --season")
+
+    for input_file, output_file, rows in flatten_files(
+            args.inputs, output_dir=args.output_dir, workers=args.workers, chunksize=args.chunksize,
+            dataset_dir=args.dataset, season=args.season, file_format=args.format):
+        print(f"Processed {input_file}: {rows} rows saved to {output_file}")
 
-# Rename columns
-data.columns = new_headers
+    if args.dataset:
+        print(f"{args.format.capitalize()} dataset saved to {args.dataset}")
 
-# Save the processed CSV file
-data.to_csv(output_file, index=False)
 
-print(f"Processed CSV saved to {output_file}")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import io
+
+import pandas as pd
+
+# Columns identifying a row of the stats table across reloads
+KEY = ('player', 'team', 'season')
+
+MODES = ('upsert', 'replace', 'append')
+
+
+def quote(name):
+    """
+    Quote an identifier so column names like 'performance_g+a' can be used as is.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_types(df):
+    """
+    Map each column of a frame to the SQL type it is stored as.
+
+    Text columns become TEXT, which PostgreSQL stores exactly like a VARCHAR, so
+    there is no need to scan every value to size them.
+    """
+    sql_types = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            sql_types[col] = 'BOOLEAN'
+        elif pd.api.types.is_integer_dtype(dtype):
+            sql_types[col] = 'BIGINT' if dtype.itemsize > 4 else 'INTEGER'
+        elif pd.api.types.is_float_dtype(dtype):
+            sql_types[col] = 'REAL' if dtype.itemsize <= 4 else 'DOUBLE PRECISION'
+        else:
+            sql_types[col] = 'TEXT'
+    return sql_types
+
+
+def table_columns(cursor, table, postgres=False):
+    """
+    Return the names of the columns an existing table has.
+    """
+    if postgres:
+        cursor.execute("SELECT column_name FROM information_schema.columns "
+                       "WHERE table_schema = current_schema() AND table_name = %s", (table,))
+        return [row[0] for row in cursor.fetchall()]
+    cursor.execute(f"PRAGMA table_info({quote(table)})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def create_table(cursor, table, df, key=KEY, postgres=False, replace=False):
+    """
+    Create the table and its unique key index unless they already exist.
+
+    A table created by an older version of the loader, e.g. with to_sql, may lack some
+    of the frame's columns. Missing stat columns are added. Missing key columns are
+    only added when the table is empty or about to be emptied (`replace`), as the
+    key of the rows already there cannot be known.
+
+    Raises:
+        ValueError: If the table has rows but lacks one of the key columns.
+    """
+    sql_types = column_types(df)
+    columns = ', '.join(f"{quote(col)} {sql_type}" for col, sql_type in sql_types.items())
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {quote(table)} ({columns})")
+
+    existing = set(table_columns(cursor, table, postgres=postgres))
+    missing = [col for col in df.columns if col not in existing]
+    missing_key = [col for col in key if col in missing]
+    if missing_key and not replace:
+        cursor.execute(f"SELECT 1 FROM {quote(table)} LIMIT 1")
+        if cursor.fetchone() is not None:
+            raise ValueError(f"Table {table} has rows but no {', '.join(missing_key)} column(s) to match them on; "
+                             f"reload it with mode='replace' or add and fill the column(s) first")
+    for col in missing:
+        cursor.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(col)} {sql_types[col]}")
+    if missing:
+        print(f"Added {len(missing)} missing column(s) to {table}: {', '.join(missing)}")
+
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {quote(table + '_key')} "
+                   f"ON {quote(table)} ({', '.join(quote(col) for col in key)})")
+
+
+def upsert_sql(table, source, columns, key=KEY):
+    """
+    Build the statement merging `source` into `table`.
+
+    Rows are matched on the key; a matched row is only rewritten when one of its
+    values actually changed, so unchanged rows cost no writes or index updates.
+    """
+    names = ', '.join(quote(col) for col in columns)
+    values = [col for col in columns if col not in key]
+    assignments = ', '.join(f"{quote(col)} = excluded.{quote(col)}" for col in values)
+    changed = ' OR '.join(f"{quote(table)}.{quote(col)} IS DISTINCT FROM excluded.{quote(col)}" for col in values)
+    # 'WHERE true' keeps SQLite from reading ON CONFLICT as a join constraint
+    return (f"INSERT INTO {quote(table)} ({names}) SELECT {names} FROM {quote(source)} WHERE true "
+            f"ON CONFLICT ({', '.join(quote(col) for col in key)}) "
+            f"DO UPDATE SET {assignments} WHERE {changed}")
+
+
+def iter_chunks(df, chunksize):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def copy_frame(cursor, table, df, chunksize=10000):
+    """
+    Stream a frame into a PostgreSQL table with COPY FROM STDIN, one CSV chunk at a time.
+
+    Missing values are written as unquoted empty fields, which COPY reads as NULL.
+    Works with both psycopg2 and psycopg 3 cursors.
+    """
+    sql = f"COPY {quote(table)} ({', '.join(quote(col) for col in df.columns)}) FROM STDIN WITH (FORMAT csv)"
+    for chunk in iter_chunks(df, chunksize):
+        buffer = io.StringIO()
+        chunk.to_csv(buffer, header=False, index=False)
+        if hasattr(cursor, 'copy_expert'):
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def insert_frame(cursor, table, df, chunksize=10000):
+    """
+    Insert a frame into a SQLite table with executemany, one chunk at a time.
+    """
+    sql = (f"INSERT INTO {quote(table)} ({', '.join(quote(col) for col in df.columns)}) "
+           f"VALUES ({', '.join('?' * len(df.columns))})")
+    for chunk in iter_chunks(df, chunksize):
+        rows = chunk.astype(object).where(chunk.notna(), None)
+        cursor.executemany(sql, rows.itertuples(index=False, name=None))
+
+
+def load_stats(df, engine, table='stats_table', mode='upsert', key=KEY, chunksize=10000):
+    """
+    Bulk load a stats frame into PostgreSQL, or SQLite for local runs.
+
+    The table and a unique index on `key` are created on first use and never dropped;
+    columns the frame has but an existing table lacks are added (see create_table).
+    In 'upsert' mode the frame is copied into a temporary staging table and merged
+    into the target in one statement: new rows are inserted and existing rows are
+    updated only where a value differs. 'replace' empties the table and reloads it,
+    and 'append' just inserts. Everything runs in one transaction, so readers never
+    see a half-loaded table.
+
+    PostgreSQL loads go through COPY FROM STDIN; SQLite uses executemany.
+
+    Args:
+        df (pandas.DataFrame): Flattened stats, e.g. from fpl.columnar.read_stats.
+        engine (sqlalchemy.engine.Engine): Target database.
+        table (str): Table name. Default is 'stats_table'.
+        mode (str): 'upsert', 'replace' or 'append'. Default is 'upsert'.
+        key (tuple): Columns identifying a row. Default is (player, team, season).
+        chunksize (int): Rows sent per COPY or executemany call. Default is 10000.
+
+    Returns:
+        int: Number of rows inserted or updated.
+
+    Raises:
+        ValueError: If the mode is unknown, or the frame or a non-empty table lacks a key column.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+
+    missing = [col for col in key if col not in df.columns]
+    if missing:
+        raise ValueError(f"Stats frame has no key column(s) {missing}")
+
+    # Rows without a full key could never be matched on a later load
+    keyed = df.dropna(subset=list(key))
+    if len(keyed) < len(df):
+        print(f"Skipping {len(df) - len(keyed)} rows with a missing {'/'.join(key)}")
+    df = keyed
+
+    postgres = engine.dialect.name == 'postgresql'
+    write = copy_frame if postgres else insert_frame
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        create_table(cursor, table, df, key=key, postgres=postgres, replace=mode == 'replace')
+
+        if mode == 'upsert':
+            staging = f"{table}_staging"
+            if postgres:
+                cursor.execute(f"CREATE TEMP TABLE {quote(staging)} "
+                               f"(LIKE {quote(table)} INCLUDING DEFAULTS) ON COMMIT DROP")
+            else:
+                cursor.execute(f"DROP TABLE IF EXISTS temp.{quote(staging)}")
+                cursor.execute(f"CREATE TEMP TABLE {quote(staging)} AS SELECT * FROM {quote(table)} WHERE 0")
+            write(cursor, staging, df, chunksize)
+            cursor.execute(upsert_sql(table, staging, list(df.columns), key=key))
+            changed = cursor.rowcount
+            if not postgres:
+                cursor.execute(f"DROP TABLE temp.{quote(staging)}")
+        else:
+            if mode == 'replace':
+                # Emptying the table keeps its definition and indexes, unlike dropping it
+                cursor.execute(f"{'TRUNCATE' if postgres else 'DELETE FROM'} {quote(table)}")
+            write(cursor, table, df, chunksize)
+            changed = len(df)
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return changed
@@ -1,50 +1,37 @@
-from bs4 import BeautifulSoup
-import pandas as pd
-import requests
-import time
+import os
+import sys
 
-all_teams = []  # List to store all teams' data
+# Make the shared helpers in scripts/common importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-html = requests.get('https://fbref.com/en/comps/9/Premier-League-Stats').text
-soup = BeautifulSoup(html, 'lxml')
-table = soup.find_all('table', class_='stats_table')[0]
+from common.cache import ResponseCache
+from common.fetch import configure
+from common.metrics import configure_metrics
+from common.ratelimit import HostScheduler
+from fpl.squads import collect_squad_stats, concat_csvs
 
-links = table.find_all('a')
-links = [l.get("href") for l in links]
-links = [l for l in links if '/squads/' in l]
+# Reuse responses from earlier runs; set OFFLINE to True to rebuild stats.csv from the cache only
+OFFLINE = False
 
-team_urls = [f"https://fbref.com{l}" for l in links]
+# fbref blocks clients that send more than ~20 requests a minute; robots.txt's
+# Crawl-delay lowers the rate further if it asks for more
+scheduler = HostScheduler(rate=1 / 3, burst=1)
+configure(cache=ResponseCache('http_cache.sqlite'), cache_only=OFFLINE, scheduler=scheduler)
 
-for team_url in team_urls:
-    team_name = team_url.split("/")[-1].replace("-Stats", "")
-    data = requests.get(team_url).text
-    soup = BeautifulSoup(data, 'lxml')
-    stats = soup.find_all('table', class_='stats_table')[0]
+# Per-stage timings: one JSON line per request and stage, and a Prometheus snapshot at the end
+metrics = configure_metrics(log_path='scrape_metrics.jsonl', prometheus_path='scrape_metrics.prom')
 
-    if stats and stats.columns:
-        stats.columns = stats.columns.droplevel()
+# Fetch every squad page, writing each team's table to squads/ as it arrives
+team_files = collect_squad_stats('https://fbref.com/en/comps/9/Premier-League-Stats', 'squads', max_workers=4)
 
-    # Convert the HTML table to a DataFrame
-    team_data = pd.read_html(str(stats))[0]
+print(f"Fetch stats: {scheduler.stats()}")
 
-    # Filter out specific columns
-    columns_to_drop = ['Unnamed: 4_level_0', 'Unnamed: 33_level_0']
-    team_data = team_data.drop(columns=columns_to_drop, errors='ignore')
-
-    # Add team name as a column
-    team_data['Team'] = team_name
-
-    # Append team data to the list
-    all_teams.append(team_data)
-
-    time.sleep(5)  # Delay to avoid overloading the server
-
-# Concatenate all teams' data into a single DataFrame
-if all_teams:
-    stat_df = pd.concat(all_teams)
-
-    # Save the concatenated DataFrame to a CSV file
-    stat_df.to_csv("stats.csv", index=False)
+# Join the per-team files into a single CSV without loading them all into memory
+if team_files:
+    concat_csvs(team_files, "stats.csv")
     print("Data has been saved to stats.csv")
 else:
     print("No team data found.")
+
+print(metrics.summary())
+metrics.close()
@@ -0,0 +1,170 @@
+import os
+import shutil
+
+import lxml.html
+import pandas as pd
+import requests
+
+from common.concurrency import ordered_map
+from common.fetch import fetch
+from common.metrics import get_metrics
+from fpl.columnar import write_dataset
+from fpl.flatten import flatten_columns
+
+# Columns of fbref's standard stats table that hold text rather than numbers
+TEXT_STATS = {'player', 'nationality', 'position', 'age', 'matches'}
+
+# Columns dropped from every squad table
+COLUMNS_TO_DROP = ['Unnamed: 4_level_0', 'Unnamed: 33_level_0']
+
+STATS_TABLE_XPATH = "//table[contains(concat(' ', normalize-space(@class), ' '), ' stats_table ')]"
+
+
+def cell_text(cell):
+    """
+    Return a cell's text with whitespace collapsed, as pandas.read_html would.
+    """
+    return ' '.join(cell.text_content().split())
+
+
+def squad_urls(comp_url):
+    """
+    Return (team_name, squad_url) pairs linked from the first stats table of a competition page.
+    """
+    page = lxml.html.fromstring(fetch(comp_url).content, base_url=comp_url)
+    page.make_links_absolute(comp_url)
+    table = page.xpath(STATS_TABLE_XPATH)[0]
+
+    links = [a.get('href') for a in table.iter('a')]
+    links = [l for l in dict.fromkeys(links) if l and '/squads/' in l]
+    return [(l.split("/")[-1].replace("-Stats", ""), l) for l in links]
+
+
+def parse_stats_table(html):
+    """
+    Extract the first stats table of an fbref page into a DataFrame in a single parse pass.
+
+    The two header rows become the same two-level column index pandas.read_html
+    produces (blank group headers are named 'Unnamed: <i>_level_0'), so the output is
+    interchangeable with the old read_html path. Repeated header rows inside the body
+    are skipped, the Squad/Opponent Total footer rows are kept, and every column except
+    the text ones is converted to numbers straight from the cell text.
+
+    Args:
+        html (str or bytes): The squad page.
+
+    Returns:
+        pandas.DataFrame: One row per player, plus the footer rows.
+    """
+    page = lxml.html.fromstring(html)
+    table = page.xpath(STATS_TABLE_XPATH)[0]
+    header_rows = table.xpath('./thead/tr')
+
+    # Expand the group header row's colspans so it lines up with the column header row
+    groups = []
+    if len(header_rows) > 1:
+        for cell in header_rows[0]:
+            groups.extend([cell_text(cell)] * int(cell.get('colspan', 1)))
+    header_cells = list(header_rows[-1])
+    groups += [''] * (len(header_cells) - len(groups))
+
+    columns = []
+    for i, (group, cell) in enumerate(zip(groups, header_cells)):
+        columns.append((group or f"Unnamed: {i}_level_0", cell_text(cell) or f"Unnamed: {i}_level_1"))
+    stats = [cell.get('data-stat', '') for cell in header_cells]
+
+    rows = []
+    for row in table.xpath('./tbody/tr | ./tfoot/tr'):
+        classes = row.get('class', '').split()
+        if 'thead' in classes or 'over_header' in classes or 'spacer' in classes:
+            continue
+        values = [cell_text(cell) or None for cell in row]
+        rows.append((values + [None] * len(columns))[:len(columns)])
+
+    data = pd.DataFrame(rows, columns=pd.MultiIndex.from_tuples(columns))
+    for position, stat in enumerate(stats):
+        if stat not in TEXT_STATS:
+            column = data.iloc[:, position].str.replace(',', '', regex=False)
+            data.isetitem(position, pd.to_numeric(column, errors='coerce'))
+    return data
+
+
+def fetch_squad_stats(team_name, team_url):
+    """
+    Download one squad page and return its stats table with a 'Team' column.
+    """
+    html = fetch(team_url).content
+    with get_metrics().stage('parse', bytes=len(html), url=team_url):
+        team_data = parse_stats_table(html)
+    team_data = team_data.drop(columns=COLUMNS_TO_DROP, level=0, errors='ignore')
+    team_data['Team'] = team_name
+    return team_data
+
+
+def collect_squad_stats(comp_url, out_dir, max_workers=4, dataset_dir=None, season=None, teams=None):
+    """
+    Fetch every squad page of a competition concurrently and write each team's table as it arrives.
+
+    Requests go through the shared Fetcher, so its HostScheduler sets the pace however
+    many workers are used; the workers only overlap downloads with parsing and writing.
+    Each team is written to '<out_dir>/<team>.csv' and then released, so memory does
+    not grow with the number of teams.
+
+    Args:
+        comp_url (str): fbref competition page listing the squads.
+        out_dir (str): Folder for the per-team CSV files.
+        max_workers (int): Number of squad pages fetched at once. Default is 4.
+        dataset_dir (str, optional): Also write each team, with flattened column names,
+            to this Parquet dataset (see fpl.columnar.write_dataset).
+        season (str, optional): Season label for the dataset partitions. Required with dataset_dir.
+        teams (list, optional): (team_name, squad_url) pairs from squad_urls, to reuse
+            a list already fetched instead of reading it from comp_url again.
+
+    Returns:
+        list: Paths of the per-team CSV files, in league table order. Teams whose page
+            could not be fetched are left out.
+    """
+    if dataset_dir and not season:
+        raise ValueError("dataset_dir needs a season")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def collect(team):
+        team_name, team_url = team
+        try:
+            team_data = fetch_squad_stats(team_name, team_url)
+        except requests.RequestException as e:
+            print(f"Error fetching squad {team_url}: {e}")
+            return team_name, None
+        path = os.path.join(out_dir, f"{team_name}.csv")
+        team_data.to_csv(path, index=False)
+        if dataset_dir:
+            team_data.columns = flatten_columns(team_data.columns)
+            write_dataset(team_data, dataset_dir, season=season)
+        return team_name, path
+
+    paths = []
+    if teams is None:
+        teams = squad_urls(comp_url)
+    for team_name, path in ordered_map(collect, teams, max_workers=max_workers):
+        if path:
+            print(f"Saved {team_name} to {path}")
+            paths.append(path)
+    return paths
+
+
+def concat_csvs(paths, output_file, header_lines=2):
+    """
+    Concatenate CSV files sharing the same header into one file without loading them.
+
+    Args:
+        paths (list): Files to join, in order.
+        output_file (str): Destination file.
+        header_lines (int): Number of header lines each file starts with. Default is 2.
+    """
+    with open(output_file, 'w', encoding='utf-8', newline='') as out:
+        for i, path in enumerate(paths):
+            with open(path, encoding='utf-8', newline='') as f:
+                if i > 0:
+                    for _ in range(header_lines):
+                        f.readline()
+                shutil.copyfileobj(f, out)
@@ -1,37 +1,38 @@
 import pandas as pd
-from sqlalchemy import create_engine, types
+from sqlalchemy import create_engine
 import os
+import sys
+
+# Make the shared helpers in scripts/ importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpl.columnar import read_stats
+from fpl.loader import load_stats
 
 # Database connection parameters
-username = 'asad'  
-password = 'asad'  
+username = 'asad'
+password = 'asad'
 host = 'localhost'
-database = 'player_stats'  
+database = 'player_stats'
 
 # File paths
 input_file = '/Users/asad/Desktop/dataScraping/scripts/processed_stats.csv'
+dataset_dir = '/Users/asad/Desktop/dataScraping/scripts/stats_dataset'
+season = '2024-2025'  # Season of the CSV, which has no season column
 
+# 'upsert' only touches new or changed rows; 'replace' reloads the whole table
+mode = 'upsert'
 
+# Read the typed Parquet dataset when flatten.py has written one, the CSV otherwise
+if os.path.isdir(dataset_dir):
+    df = read_stats(dataset_dir)
+else:
+    df = pd.read_csv(input_file).assign(season=season)
 
-# Read the CSV
-df = pd.read_csv(input_file)
-
-# Create SQLAlchemy engine
+# Create SQLAlchemy engine (e.g. 'sqlite:///player_stats.sqlite' for a local copy)
 engine = create_engine(f'postgresql://{username}:{password}@{host}/{database}')
 
-# Infer column types and adjust as needed
-dtype_mapping = {}
-for col in df.columns:
-    if df[col].dtype == 'object':
-        # For string columns, set a reasonable max length
-        max_length = df[col].str.len().max() or 255
-        dtype_mapping[col] = types.VARCHAR(max_length)
-    elif 'float' in str(df[col].dtype):
-        dtype_mapping[col] = types.FLOAT
-    elif 'int' in str(df[col].dtype):
-        dtype_mapping[col] = types.INTEGER
-
-# Write dataframe to PostgreSQL
-df.to_sql('stats_table', engine, if_exists='replace', index=False, dtype=dtype_mapping)
-
-print("CSV successfully imported to PostgreSQL")
\ No newline at end of file
+# Bulk load with COPY, keeping the table and its indexes in place
+changed = load_stats(df, engine, table='stats_table', mode=mode)
+
+print(f"Loaded {len(df)} rows into PostgreSQL ({changed} inserted or updated)")
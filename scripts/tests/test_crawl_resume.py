@@ -0,0 +1,65 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+# Make the shared helpers in scripts/ importable when run from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_site import FixtureSite
+from blogs.checkpoint import CrawlState
+from blogs.engine import scrape_all
+from blogs.profiles import BLOGGER_HTML
+from common.fetch import configure
+
+
+class FlakySite(FixtureSite):
+    """
+    Fixture site whose listing page `broken_page` answers 404 until it is fixed.
+    """
+
+    broken_page = None
+
+    def blogger_page(self, page):
+        if page == self.broken_page:
+            return None
+        return super().blogger_page(page)
+
+
+class ResumeAfterListingErrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.tmp.name, 'crawl_state.json')
+        configure()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def crawl(self, site):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scrape_all(BLOGGER_HTML, site.listing_url('blogger'), max_workers=4,
+                              state_file=self.state_file, incremental=True)
+
+    def test_failed_listing_page_is_resumed(self):
+        with FlakySite(posts=50, per_page=10, post_bytes=200) as site:
+            site.broken_page = 2
+            posts = self.crawl(site)
+            self.assertEqual(len(posts), 20)
+            # The failed walk did not count as reaching the end of the listing
+            self.assertIsNotNone(CrawlState.load(self.state_file).next_page_url)
+
+            site.broken_page = None
+            posts = self.crawl(site)
+
+        self.assertEqual(sorted(post['title'] for post in posts),
+                         sorted(f"Benchmark post {i}" for i in range(50)))
+        state = CrawlState.load(self.state_file)
+        self.assertIsNone(state.next_page_url)
+        self.assertEqual(len(state.records), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
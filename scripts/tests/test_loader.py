@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+# Make the shared helpers in scripts/ importable when run from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpl.loader import load_stats
+
+
+def stats_frame(goals=1):
+    return pd.DataFrame({
+        'player': ['Bukayo Saka', 'Declan Rice'],
+        'team': ['Arsenal', 'Arsenal'],
+        'season': ['2024-2025', '2024-2025'],
+        'performance_gls': [goals, 2],
+        'expected_xg': [0.2, 0.04],
+    })
+
+
+class LegacyTableTest(unittest.TestCase):
+    """
+    Loads into a stats_table as the old toDatabase.py created it: to_sql(if_exists='replace'),
+    with no season column and no unique key.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'stats.sqlite')
+        self.engine = create_engine(f'sqlite:///{self.path}')
+        legacy = stats_frame().drop(columns=['season', 'expected_xg'])
+        legacy.to_sql('stats_table', self.engine, if_exists='replace', index=False)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def rows(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute('SELECT player, season, performance_gls, expected_xg FROM stats_table '
+                                'ORDER BY player').fetchall()
+
+    def test_upsert_into_legacy_rows_asks_for_migration(self):
+        with self.assertRaisesRegex(ValueError, "no season column"):
+            load_stats(stats_frame(), self.engine, mode='upsert')
+
+    def test_replace_adds_missing_columns(self):
+        load_stats(stats_frame(), self.engine, mode='replace')
+        self.assertEqual(self.rows(), [('Bukayo Saka', '2024-2025', 1, 0.2), ('Declan Rice', '2024-2025', 2, 0.04)])
+
+        # The migrated table takes upserts keyed on the season
+        changed = load_stats(stats_frame(goals=3), self.engine, mode='upsert')
+        self.assertEqual(changed, 1)
+        self.assertEqual(self.rows()[0], ('Bukayo Saka', '2024-2025', 3, 0.2))
+
+    def test_upsert_into_empty_legacy_table(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('DELETE FROM stats_table')
+        self.assertEqual(load_stats(stats_frame(), self.engine, mode='upsert'), 2)
+        self.assertEqual(len(self.rows()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
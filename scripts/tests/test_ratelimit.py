@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import unittest
+
+# Make the shared helpers in scripts/ importable when run from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.ratelimit import HostScheduler
+
+
+class FakeResponse:
+
+    def __init__(self, text):
+        self.status_code = 200
+        self.text = text
+
+
+class FakeSession:
+    """
+    Session serving a fixed robots.txt, so no request leaves the machine.
+    """
+
+    def __init__(self, robots_txt):
+        self.robots_txt = robots_txt
+
+    def get(self, url, timeout=None):
+        return FakeResponse(self.robots_txt)
+
+
+def time_requests(scheduler, session, count):
+    start = time.monotonic()
+    for i in range(count):
+        scheduler.acquire(f"http://example.com/post/{i}", session)
+    return time.monotonic() - start
+
+
+class CrawlDelayTest(unittest.TestCase):
+
+    def test_crawl_delay_spaces_the_first_requests(self):
+        scheduler = HostScheduler(rate=100, burst=8)
+        # robots.txt only takes whole seconds
+        session = FakeSession("User-agent: *\nCrawl-delay: 1\n")
+        # The second request waits the full delay, despite the burst of 8
+        self.assertGreaterEqual(time_requests(scheduler, session, 2), 0.95)
+        self.assertEqual(scheduler.stats()['throttled_requests'], 1)
+
+    def test_burst_applies_without_crawl_delay(self):
+        scheduler = HostScheduler(rate=1, burst=8)
+        session = FakeSession("User-agent: *\nAllow: /\n")
+        self.assertLess(time_requests(scheduler, session, 8), 0.1)
+        self.assertEqual(scheduler.stats()['throttled_requests'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()